@@ -0,0 +1,111 @@
+"""
+Compares the number of group draws per level made by DungeonStats.level_progression() with the ones made by the
+previous nested rejection loops, for levels 1 to 120. Run from the root of the project:
+
+    python -m benchmarks.level_progression
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from random import seed
+
+import game_stats as gs
+from game_stats import DungeonStats
+from items_kinds import get_item_kind
+
+
+def rejection_draws(stats: DungeonStats) -> int:
+    """
+    Runs the previous version of DungeonStats.level_progression(), which resampled each group until its total lay
+    within the group range and all of them again until the grand total was below DungeonStats.max_total_freq
+    :param stats: DungeonStats of the level
+    :return: number of group draws made
+    """
+    draws: int = 0
+
+    def draw(group: list[tuple[type, int | float]], min_freq: float, max_freq: float) -> dict[str, float]:
+        nonlocal draws
+        while True:
+            frequencies = {stats_class.char: stats_class.calculate_frequency(stats_seed)
+                           for stats_class, stats_seed in group}
+            draws += 1
+            if min_freq <= sum(frequencies.values()) <= max_freq:
+                return frequencies
+
+    level = stats.stats_level
+    total_freq: float | None = None
+    while total_freq is None or total_freq > stats.max_total_freq:
+        monster_frequencies = draw([(gs.KoboldStats, level), (gs.BlindLizardStats, level), (gs.BlackDeathStats, level),
+                                    (gs.CaveHoundStats, level), (gs.GrowlStats, level), (gs.RockGolemStats, level),
+                                    (gs.DarkGnomeStats, level), (gs.NightmareStats, level), (gs.LindWormStats, level),
+                                    (gs.WanderingShadowStats, level), (gs.DepthsWispStats, level),
+                                    (gs.MountainDjinnStats, level), (gs.PixieStats, level),
+                                    (gs.RattleSnakeStats, level), (gs.PenumbraStats, level),
+                                    (gs.ClawJawStats, level)],
+                                   gs.MonsterStats.min_group_freq, gs.MonsterStats.max_group_freq)
+        total_monster_freq = sum(monster_frequencies.values())
+
+        wall_frequencies = draw([(gs.RockWallStats, level), (gs.GraniteWallStats, level), (gs.QuartzWallStats, level)],
+                                gs.WallStats.min_group_freq, gs.WallStats.max_group_freq)
+
+        diggable_wall_frequency = wall_frequencies[gs.RockWallStats.char] + wall_frequencies[gs.GraniteWallStats.char]
+        weapon_shovel_frequencies = draw([(gs.ShovelStats, diggable_wall_frequency),
+                                          (gs.WeaponStats, total_monster_freq)],
+                                         gs.WeaponShovelStats.min_group_freq, gs.WeaponShovelStats.max_group_freq)
+
+        draw([(gs.JerkyStats, total_monster_freq), (gs.CoffeeStats, total_monster_freq),
+              (gs.WhiskyStats, total_monster_freq), (gs.TobaccoStats, total_monster_freq)],
+             gs.ItemStats.min_group_freq, gs.ItemStats.max_group_freq)
+
+        trap_frequency = draw([(gs.TrapStats, level)], gs.TrapStats.min_group_freq, gs.TrapStats.max_group_freq)
+
+        total_freq = (total_monster_freq + sum(wall_frequencies.values()) + sum(weapon_shovel_frequencies.values())
+                      + sum(trap_frequency.values()))
+
+    return draws
+
+
+def constrained_draws(stats: DungeonStats) -> int:
+    """
+    Runs DungeonStats.level_progression(), checking that its frequencies keep the group ranges and the max total
+    :param stats: DungeonStats of the level
+    :return: number of group draws made
+    """
+    frequencies = stats.level_progression()
+    non_walls = frequencies["non_walls"]
+    groups: dict[str, tuple[float, list[float]]] = {
+        "monsters": (sum(non_walls[char] for char in non_walls if get_item_kind(char) == "monster"),
+                     [gs.MonsterStats.min_group_freq, gs.MonsterStats.max_group_freq]),
+        "walls": (sum(frequencies["walls"].values()), [gs.WallStats.min_group_freq, gs.WallStats.max_group_freq]),
+        "weapons and shovels": (non_walls[gs.ShovelStats.char] + non_walls[gs.WeaponStats.char],
+                                [gs.WeaponShovelStats.min_group_freq, gs.WeaponShovelStats.max_group_freq]),
+        "traps": (non_walls[gs.TrapStats.char], [gs.TrapStats.min_group_freq, gs.TrapStats.max_group_freq])
+    }
+
+    for name, (total_freq, (min_freq, max_freq)) in groups.items():
+        if not min_freq - 1e-9 <= total_freq <= max_freq + 1e-9:
+            raise Exception(f"Level {stats.stats_level}: {name} frequency {total_freq} out of [{min_freq}, {max_freq}]")
+    if sum(total_freq for total_freq, _ in groups.values()) > stats.max_total_freq + 1e-9:
+        raise Exception(f"Level {stats.stats_level}: total frequency above {stats.max_total_freq}")
+
+    return stats.frequency_draws
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-level", type=int, default=120)
+    parser.add_argument("--samples", type=int, default=50, help="level_progression() calls per level")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    seed(args.seed)
+    print(f"{'level':>5} {'rejection mean':>15} {'rejection max':>14} {'constrained mean':>17} {'constrained max':>16}")
+    for level in range(1, args.max_level + 1):
+        rejection = [rejection_draws(DungeonStats(level)) for _ in range(args.samples)]
+        constrained = [constrained_draws(DungeonStats(level)) for _ in range(args.samples)]
+        print(f"{level:>5} {sum(rejection) / args.samples:>15.1f} {max(rejection):>14} "
+              f"{sum(constrained) / args.samples:>17.1f} {max(constrained):>16}")
+
+
+if __name__ == "__main__":
+    main()
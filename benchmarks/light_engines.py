@@ -0,0 +1,92 @@
+"""
+Composites the same seeded bright spots with the pure Python and the compiled (cythonized_lights) light engines,
+checking that both produce identical alpha buffers and comparing their time per frame. Run from the root of the
+project, after building the compiled engine with setup.py:
+
+    python -m benchmarks.light_engines
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from random import seed, uniform
+from time import perf_counter
+from numpy import full, uint8, array_equal
+
+from light_kernels import BrightSpot, get_light_kernel, get_falloff_table, get_flicker_gradient, composite_bright_spot
+
+DARKNESS_INTENSITY: int = 150  # same as DarknessManager.darkness_intensity
+
+
+def generate_bright_spots(width: int, height: int, number: int, radius: float) -> list[BrightSpot]:
+    """
+    Generates bright spots like the torches placed by DarknessManager.place_torches(), at random centers
+    :param width: width of the darkness layer
+    :param height: height of the darkness layer
+    :param number: number of bright spots
+    :param radius: radius of the bright spots, in pixels
+    :return: list of BrightSpots
+    """
+    return [BrightSpot((uniform(0, width), uniform(0, height)), radius, 0.8, (0.45, 0.75)) for _ in range(number)]
+
+
+def render_frames(engine, bright_spots: list[BrightSpot], width: int, height: int, frames: int) -> list:
+    """
+    Renders the alpha of the darkness layer for a number of frames with one engine. Flicker exponents are drawn
+    once per frame and bright spot, so both engines must be run after the same seed
+    :param engine: compositing function of the engine
+    :param bright_spots: bright spots to composite
+    :param width: width of the darkness layer
+    :param height: height of the darkness layer
+    :param frames: number of frames
+    :return: alpha buffers of all the frames
+    """
+    alpha_layers: list = []
+    for _ in range(frames):
+        alpha_layer = full((height, width), DARKNESS_INTENSITY, dtype=uint8)
+        for bright_spot in bright_spots:
+            kernel = get_light_kernel(bright_spot.center, bright_spot.radius, width, height)
+            table = get_falloff_table(get_flicker_gradient(bright_spot.gradient), bright_spot.intensity,
+                                      DARKNESS_INTENSITY)
+            engine(alpha_layer, kernel, table, DARKNESS_INTENSITY)
+        alpha_layers.append(alpha_layer)
+
+    return alpha_layers
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--torches", type=int, default=20)
+    parser.add_argument("--radius", type=float, default=150.0, help="radius of the torches, in pixels")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engines: dict = {"python": composite_bright_spot}
+    try:
+        from cythonized_lights import composite_bright_spot as compiled_composite_bright_spot
+        engines["cython"] = compiled_composite_bright_spot
+    except ImportError:
+        print("cythonized_lights is not built, only the python engine is run")
+
+    seed(args.seed)
+    bright_spots = generate_bright_spots(args.width, args.height, args.torches, args.radius)
+
+    alpha_layers: dict[str, list] = {}
+    for name, engine in engines.items():
+        seed(args.seed)
+        start = perf_counter()
+        alpha_layers[name] = render_frames(engine, bright_spots, args.width, args.height, args.frames)
+        print(f"{name:>6}: {(perf_counter() - start) * 1000 / args.frames:8.2f} ms per frame")
+
+    if "cython" not in alpha_layers:
+        return
+    if not all(array_equal(python_layer, cython_layer)
+               for python_layer, cython_layer in zip(alpha_layers["python"], alpha_layers["cython"])):
+        raise Exception("Engines produce different alpha buffers")
+    print("alpha buffers are identical")
+
+
+if __name__ == "__main__":
+    main()
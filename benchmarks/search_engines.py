@@ -0,0 +1,105 @@
+"""
+Compares the number of positions expanded per query by the engines of PathFinder.shortest_path() on blueprints
+generated for levels 1 to 120. Run from the root of the project:
+
+    python -m benchmarks.search_engines
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from random import seed, choice
+
+from dungeon_blueprint import Blueprint
+from game_stats import DungeonStats
+from path_finder import PathFinder
+
+ENGINES: tuple[str, ...] = ("bfs", "a_star", "bidirectional")
+
+
+class BlueprintBoard:
+    """
+    Minimal stand-in of DungeonLayout exposing what PathFinder needs, so the benchmark runs without Kivy
+    """
+    def __init__(self, blueprint: Blueprint):
+        self.rows: int = blueprint.y_axis
+        self.cols: int = blueprint.x_axis
+
+
+def generate_blueprint(level: int) -> Blueprint:
+    """
+    Generates a blueprint as DungeonLayout._generate_blueprint() does, leaving out the items whose number depends
+    on the state of the Players
+    :param level: level of the dungeon
+    :return: generated blueprint
+    """
+    stats = DungeonStats(level)
+    blueprint = Blueprint(stats.size, stats.size)
+    blueprint.place_items_as_group(["%", "?", "&"], min_dist=1)
+    blueprint.place_items(" ", 1)
+    blueprint.place_items("o", stats.gem_number)
+
+    frequencies: dict[str, dict] = stats.level_progression()
+    for item, frequency in frequencies["non_walls"].items():
+        blueprint.place_items(item=item, number_of_items=int(frequency * blueprint.area))
+
+    numbers_of_walls: dict[str, int] = {key: int(value * blueprint.area)
+                                        for key, value in frequencies["walls"].items()}
+    placed_walls: dict = blueprint.place_items_on_top_shuffled(numbers_of_walls, on_top_kind="pickable",
+                                                               skip=["j", "p", "x"])
+    for wall, number in numbers_of_walls.items():
+        blueprint.place_items(item=wall, number_of_items=number - placed_walls[wall])
+
+    return blueprint
+
+
+def run_level(level: int, queries: int) -> dict[str, float]:
+    """
+    Runs the same random queries with all the engines on one generated blueprint, checking that all of them return
+    paths of the same length
+    :param level: level of the blueprint
+    :param queries: number of queries
+    :return: dictionary with the mean number of expanded positions per query of each engine
+    """
+    blueprint = generate_blueprint(level)
+    positions = [(y, x) for y in range(blueprint.y_axis) for x in range(blueprint.x_axis)]
+    # obstacles of a Monster chasing Players
+    blocked_positions = {position for position in positions
+                         if blueprint.has_item_kind(position, "wall") or blueprint.has_item_kind(position, "player")}
+    starts = [position for position in positions if blueprint.has_item_kind(position, "monster")] or positions
+    pairs = [(choice(starts), choice(positions)) for _ in range(queries)]
+
+    path_finders = {engine: PathFinder(BlueprintBoard(blueprint), engine=engine) for engine in ENGINES}
+    for start, end in pairs:
+        lengths = {len(path_finder.shortest_path(start, end, blocked_positions))
+                   for path_finder in path_finders.values()}
+        if len(lengths) > 1:
+            raise Exception(f"Engines disagree on level {level} from {start} to {end}: {lengths}")
+
+    return {engine: path_finder.expanded_positions / queries for engine, path_finder in path_finders.items()}
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--first-level", type=int, default=1)
+    parser.add_argument("--last-level", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=200, help="queries per level")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    seed(args.seed)
+
+    print(f"{'level':>5} {'size':>4} " + " ".join(f"{engine:>13}" for engine in ENGINES))
+    totals: dict[str, float] = {engine: 0.0 for engine in ENGINES}
+
+    for level in range(args.first_level, args.last_level + 1):
+        expansions = run_level(level, args.queries)
+        for engine in ENGINES:
+            totals[engine] += expansions[engine]
+        print(f"{level:>5} {DungeonStats(level).size:>4} "
+              + " ".join(f"{expansions[engine]:>13.1f}" for engine in ENGINES))
+
+    levels = args.last_level - args.first_level + 1
+    print(f"{'mean':>10} " + " ".join(f"{totals[engine] / levels:>13.1f}" for engine in ENGINES))
+
+
+if __name__ == "__main__":
+    main()
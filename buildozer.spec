@@ -19,14 +19,15 @@ source.include_exts = py,png,kv,ogg,otf
 # source.include_patterns = assets/*,images/*.png
 
 # (list) Source files to exclude (let empty to not exclude anything)
+# cythonized_lights (pyx, so) is desktop only, see darkness_manager.py
 source.exclude_exts = spec,pyx,txt,md,so
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = tests,bin,venv,__pycache__,trash,build
+source.exclude_dirs = tests,bin,venv,__pycache__,trash,build,benchmarks
 
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
-source.exclude_patterns = setup.py,saved_game.json
+source.exclude_patterns = setup.py,saved_game.json,minemadness.ini
 
 # (str) Application versioning (method 1)
 version = 4.0
@@ -1,43 +1,31 @@
-from kivy.graphics import Rectangle
-from kivy.graphics.texture import Texture
-from random import choice, uniform
-from numpy cimport ndarray, uint8_t, int16_t
-from numpy import uint8, int16, clip, ogrid, zeros
+# cython: boundscheck=False, wraparound=False, initializedcheck=False
+from cython.parallel cimport prange
+from libc.stdint cimport uint8_t, uint16_t, int16_t
 
-cpdef object generate_darkness_layer(object dungeon, int alpha_intensity):
+
+cpdef void composite_bright_spot(uint8_t[:, :] alpha_layer, object kernel, const int16_t[:] table, int max_alpha):
     """
-    Generates a darkness layer with optional illuminated areas
-    :param alpha_intensity: alpha intensity of the darkness. Must range from 0 to 255
-    :return: darkness layer to be displayed on the canvas
+    Subtracts the brightness of a bright spot from the alpha of the darkness, only within its bounding box.
+    Compiled version of light_kernels.composite_bright_spot(), producing the same alpha. Rows of the bounding box
+    are processed in parallel if the module is built with OpenMP (see setup.py)
+    :param alpha_layer: alpha of the darkness, of shape (height, width). Modified in place
+    :param kernel: LightKernel of the bright spot
+    :param table: falloff table of the bright spot (see light_kernels.get_falloff_table())
+    :param max_alpha: alpha intensity of the darkness (0 to 255)
+    :return: None
     """
     cdef:
-        object texture
-        ndarray[uint8_t, ndim=3] data
-        dict bright_spot
-        float gradient, max_distance
-        ndarray y_pos, x_pos
-        ndarray distance_from_center
-        ndarray light_mask
-        ndarray brightness
-        ndarray[int16_t, ndim=1] temp_data
-
-    texture = Texture.create(size=dungeon.size, colorfmt="rgba")
-    data = zeros((texture.height, texture.width, 4), dtype=uint8)
-    data[:, :, 3] = alpha_intensity
-
-    for bright_spot in dungeon.bright_spots:
-        gradient = uniform(bright_spot["gradient"][0], bright_spot["gradient"][1])
-        max_distance = bright_spot["radius"] ** 2
-        y_pos, x_pos = ogrid[:texture.height, :texture.width]  # grid of coordinates of all pixels
-
-        distance_from_center = (x_pos - bright_spot["center"][0]) ** 2 + (y_pos - bright_spot["center"][1]) ** 2
-        light_mask = (distance_from_center < max_distance)  # [bool] array
-        brightness = ((1 - (distance_from_center[light_mask] / max_distance) ** gradient)
-                      * alpha_intensity * bright_spot["intensity"])
-
-        temp_data = data[light_mask, 3].astype(int16) - brightness.astype(int16)
-        data[light_mask, 3] = clip(temp_data, 0, alpha_intensity).astype(uint8)
-
-    texture.blit_buffer(data.flatten(), colorfmt="rgba", bufferfmt="ubyte")
+        const uint16_t[:, :] index_map = kernel.index_map  # pixels outside the circle have brightness 0
+        Py_ssize_t row_start = kernel.rows.start
+        Py_ssize_t col_start = kernel.cols.start
+        Py_ssize_t row, col
+        int value
 
-    return Rectangle(texture=texture, pos=dungeon.pos, size=dungeon.size)
\ No newline at end of file
+    for row in prange(index_map.shape[0], nogil=True, schedule="static"):
+        for col in range(index_map.shape[1]):
+            value = alpha_layer[row_start + row, col_start + col] - table[index_map[row, col]]
+            if value < 0:
+                value = 0
+            elif value > max_alpha:
+                value = max_alpha
+            alpha_layer[row_start + row, col_start + col] = <uint8_t> value
@@ -1,28 +1,81 @@
 from __future__ import annotations
 
 from kivy.graphics.texture import Texture
-from kivy.graphics import Rectangle
+from kivy.graphics import Rectangle, RenderContext
 from kivy.clock import Clock
 from kivy.properties import ListProperty
 from kivy.event import EventDispatcher
 from kivy.app import App
+from kivy.core.window import Window
 
-from random import choice, uniform
-from numpy import zeros, uint8, ogrid, int16, clip
+from random import choice
+from heapq import heappush, heappop
+from itertools import count
+from math import ceil
+from time import perf_counter
+from numpy import zeros, full, uint8, ndarray
+
+from light_kernels import (BrightSpot, get_light_kernel, get_falloff_table, get_flicker_gradient,
+                           composite_bright_spot)
+from frame_governor import FrameGovernor
+
+try:
+    # compiled light engine, built with setup.py
+    from cythonized_lights import composite_bright_spot as compiled_composite_bright_spot
+except ImportError:
+    # desktop only: Android builds do not package it (there is no python-for-android recipe for it), so they always
+    # use the pure Python one
+    compiled_composite_bright_spot = None
+
+FLICKER_FRAMES: int = 30  # length of the loop of pre-rendered flicker frames (2 seconds at 15 fps)
+
+# draws a single channel texture as black with the alpha of its texels (see DarknessManager.texture_format)
+ALPHA_MASK_SHADER: str = """
+$HEADER$
+void main(void) {
+    gl_FragColor = vec4(0.0, 0.0, 0.0, texture2D(texture0, tex_coord0).r * frag_color.a);
+}
+"""
 
 class DarknessManager(EventDispatcher):
     """
     Manages the darkness layer covering the dungeon and the logic of torch placement and flickering
     """
-    bright_spots = ListProperty([])
+    bright_spots = ListProperty([])  # BrightSpots of the light Tokens, timed ones are in DarknessManager.timed_spots
 
     def __init__(self, dungeon: DungeonLayout, torches_dict: dict | None, **kwargs):
         super().__init__(**kwargs)
         self.dungeon: DungeonLayout = dungeon
         self.torches_dict: dict | None = torches_dict
-        self.darkness: Rectangle | None = None
+        self.darkness: Rectangle | None = None  # created once, its texture is updated on each frame
+        # instruction added to DungeonLayout.canvas.after: DarknessManager.darkness itself or, in "luminance"
+        # texture_format, the RenderContext drawing it with ALPHA_MASK_SHADER
+        self.darkness_instruction: Rectangle | RenderContext | None = None
+        # "luminance" uploads only the alpha of the darkness (1 byte per pixel), "rgba" uploads 4 bytes per pixel
+        # and does not need shaders. Falls back to "rgba" if ALPHA_MASK_SHADER does not compile
+        self.texture_format: str = "luminance"
+        self.texture: Texture | None = None  # reused across frames, recreated only when DungeonLayout.size changes
+        self.buffer: ndarray | None = None  # pixels of DarknessManager.texture, reused across frames
+        self.scale: float = 1.0  # resolution of DarknessManager.texture relative to DungeonLayout.size
+        # alpha of the darkness with all the bright spots that do not change between frames, rebuilt only
+        # when light Tokens are added or removed (see DarknessManager.get_static_layer())
+        self.static_layer: ndarray | None = None
+        self.static_layer_key: tuple | None = None
+        # ring of alpha layers with the flickering bright spots composited over the static layer, rendered lazily
+        # the first time they are played and looped afterward. Cleared when the static layer is rebuilt
+        self.flicker_frames: list[ndarray | None] = [None] * FLICKER_FRAMES
+        self.flicker_index: int = 0  # index of the last frame played from DarknessManager.flicker_frames
+        self.built_layers: int = 0  # number of static layers and flicker frames rendered, they are cached afterward
         self.darkness_intensity: int = 150  #  alpha intensity of the darkness. Must range from 0 to 255
+        # engine compositing the bright spots: "cython" (compiled) if available, otherwise "python"
+        self.light_engine: str = "python" if compiled_composite_bright_spot is None else "cython"
         self.flickering_torches: ClockEvent | None = None
+        # min-heap of (expiry time, insertion order, BrightSpot) of the bright spots lasting a limited time
+        self.timed_spots: list[tuple[float, int, BrightSpot]] = []
+        self.timed_spots_order: count = count()  # breaks ties between timed spots expiring at the same time
+        self.expiring_spots: ClockEvent | None = None  # fires when the first timed spot of the heap expires
+        self.flickering_interval: float | None = None  # interval of DarknessManager.flickering_torches
+        self.governor: FrameGovernor = FrameGovernor()  # adjusts the flicker to the frame budget
 
     def initialize_torches(self) -> None:
         """
@@ -118,101 +171,290 @@ class DarknessManager(EventDispatcher):
                     
     def update_bright_spots(self) -> None:
         """
-        Stores in DungeonLayout.bright_spots one bright spot dict for each Token with bright_intensity > 0
+        Stores in DarknessManager.bright_spots one BrightSpot for each Token with bright_intensity > 0
         :return: None
         """
-        current_bright_spots = self.bright_spots[:]
-    
-        self.bright_spots = ([{"center": token.center,
-                                "radius": token.bright_radius,
-                                "intensity": token.bright_int,
-                                "gradient": token.gradient,
-                                "timeout": None,
-                                "max_timeout": None}
-                                for tile in self.dungeon.children
-                                for token_list in tile.tokens.values()
-                                for token in token_list if token.bright_int > 0]
-                                +
-                                [bright_spot for bright_spot in current_bright_spots if
-                                bright_spot["max_timeout"] is not None])
-    
+        self.static_layer = None  # light Tokens may have been added or removed
+
+        self.bright_spots = [BrightSpot(token.center, token.bright_radius, token.bright_int, token.gradient)
+                             for tile in self.dungeon.children
+                             for token_list in tile.tokens.values()
+                             for token in token_list if token.bright_int > 0]
+
     def add_bright_spot(self, center: tuple[float, float], radius: float, intensity: float,
-                        gradient: tuple[float, float], timeout: float | None, max_timeout: float | None) -> None:
+                        gradient: tuple[float, float], duration: float) -> None:
         """
-        Adds a single bright spot dict to DungeonLayout.bright_spots
+        Adds a bright spot lasting a limited time (e.g. explosions) to DarknessManager.timed_spots. The darkness is
+        cast once now and once more when it expires, so timed spots do not need the flicker to be running
+        :param center: coordinates (x, y) of the center, in pixels of the DungeonLayout
+        :param radius: radius of the bright spot, in pixels
+        :param intensity: intensity of the bright spot (0 to 1)
+        :param gradient: (min, max) of the exponent of the falloff
+        :param duration: time the bright spot lasts, in seconds
         :return: None
         """
-        self.bright_spots.append({key: value for key, value in locals().items() if key != "self"})
-    
+        heappush(self.timed_spots, (Clock.get_time() + duration, next(self.timed_spots_order),
+                                    BrightSpot(center, radius, intensity, gradient)))
+        self._schedule_expiry()
+        self.cast_darkness()
+
+    def _schedule_expiry(self) -> None:
+        """
+        Schedules DarknessManager.expire_bright_spots() when the first timed spot of the heap expires, cancelling
+        the previous schedule if any
+        :return: None
+        """
+        if self.expiring_spots is not None:
+            self.expiring_spots.cancel()
+            self.expiring_spots = None
+
+        if len(self.timed_spots) > 0:
+            self.expiring_spots = Clock.schedule_once(lambda dt: self.expire_bright_spots(),
+                                                      max(0.0, self.timed_spots[0][0] - Clock.get_time()))
+
+    def expire_bright_spots(self) -> None:
+        """
+        Removes the expired timed spots from the heap and casts the darkness without them
+        :return: None
+        """
+        now = Clock.get_time()
+        while len(self.timed_spots) > 0 and self.timed_spots[0][0] <= now:
+            heappop(self.timed_spots)
+
+        self._schedule_expiry()
+        self.cast_darkness()
+
     @staticmethod
-    def on_bright_spots(dm: DarknessManager, bright_spots: list[dict]) -> None:
+    def on_bright_spots(dm: DarknessManager, bright_spots: list[BrightSpot]) -> None:
         """
         Callback triggered upon modification of DungeonLayout.bright_spots
         :param dm: DarknessManager instance
-        :param bright_spots: list containing the center pos of all torches centers
+        :param bright_spots: BrightSpots of all the light Tokens
         :return: None
         """
-        if dm.flickering_torches is not None:
-            dm.flickering_torches.cancel()
-
         if len(dm.bright_spots) > 0 and App.get_running_app().flickering_torches_on:
-            dm.flickering_torches = Clock.schedule_interval(lambda dt: dm.darkness_flicker(dt=dt), 1 / 15)
+            dm._schedule_flicker()
         else:
+            if dm.flickering_torches is not None:
+                dm.flickering_torches.cancel()
+                dm.flickering_torches = None
             # if last bright spot is removed, cast static darkness
-            if dm.darkness in dm.dungeon.canvas.after.children:
-                dm.dungeon.canvas.after.remove(dm.darkness)
+            dm.cast_darkness()
+
+    def _schedule_flicker(self) -> None:
+        """
+        Schedules DarknessManager.darkness_flicker() at the interval set by DarknessManager.governor, cancelling
+        the previous schedule if any
+        :return: None
+        """
+        if self.flickering_torches is not None:
+            self.flickering_torches.cancel()
+
+        self.flickering_interval = self.governor.interval
+        self.flickering_torches = Clock.schedule_interval(lambda dt: self.darkness_flicker(dt=dt),
+                                                          self.flickering_interval)
 
-            with dm.dungeon.canvas.after:
-                # uncomment this to run the cythonized version
-                # dungeon.darkness = cl.generate_darkness_layer(dungeon, dungeon.darkness_intensity)
-                dm.darkness = dm.generate_darkness_layer()
-    
     def darkness_flicker(self, dt: float) -> None:
         """
-        Wrapper function that generates a darkness with flickering brightness points. Needs to be scheduled
-        using Clock.schedule_interval() and specifying the desired frequency
+        Wrapper function that generates a darkness with flickering brightness points. Scheduled by
+        DarknessManager._schedule_flicker(), which is called again if DarknessManager.governor changes the interval.
+        Ticks are skipped while the app runs over the frame budget
         :param dt: delta time
         :return: None
         """
-        for bright_spot in self.bright_spots:
-            if bright_spot["timeout"] is not None:
-                bright_spot["timeout"] += dt
-                if bright_spot["timeout"] > bright_spot["max_timeout"]:
-                    self.bright_spots.remove(bright_spot)
+        if not self.governor.should_skip(Clock.frametime):
+            built_layers, start = self.built_layers, perf_counter()
+            self.cast_darkness()
+            self.governor.record_render(start, perf_counter(), one_off=self.built_layers != built_layers)
 
-        if self.darkness in self.dungeon.canvas.after.children:
-            self.dungeon.canvas.after.remove(self.darkness)
+        # not rescheduled if the flicker was cancelled meanwhile (see DarknessManager.on_bright_spots())
+        if self.flickering_torches is not None and self.governor.interval != self.flickering_interval:
+            self._schedule_flicker()
 
-        with self.dungeon.canvas.after:
-            # uncomment this to run the cythonized version
-            # self.darkness = cl.generate_darkness_layer(self, alpha_intensity)
-            self.darkness = self.generate_darkness_layer()
+    def get_render_stats(self) -> dict[str, float | int]:
+        """
+        Returns the performance of the darkness flicker (see FrameGovernor.get_stats()) and the current resolution
+        scale of the darkness mask
+        :return: dictionary with the measures
+        """
+        return self.governor.get_stats() | {"scale": self.scale}
 
-    def generate_darkness_layer(self) -> Rectangle:
+    def cast_darkness(self) -> None:
         """
-        **********************************************************************************
-        THIS FUNCTION HAS BEEN CYTHONIZED -- SEE cythonized_lights.pyx
-        **********************************************************************************
-        Generates a darkness layer with optional illuminated areas
-        :return: darkness layer to be displayed on the canvas
+        Renders the darkness layer and displays it on DungeonLayout.canvas.after. The Rectangle is created only once,
+        afterward its texture, pos and size are updated
+        :return: None
         """
-        texture = Texture.create(size=self.dungeon.size, colorfmt="rgba")
-        data = zeros((texture.height, texture.width, 4), dtype=uint8)
-        data[:, :, 3] = self.darkness_intensity
+        if self.darkness is None:
+            self.darkness = Rectangle(pos=self.dungeon.pos, size=self.dungeon.size)
+            self.darkness_instruction = self._get_darkness_instruction()
 
-        for bright_spot in self.bright_spots:
-            gradient = uniform(bright_spot["gradient"][0], bright_spot["gradient"][1])
-            max_distance = bright_spot["radius"] ** 2
-            y_pos, x_pos = ogrid[:texture.height, :texture.width]  # grid of coordinates of all pixels
+        self.darkness.texture = self.generate_darkness_layer()
+        self.darkness.pos, self.darkness.size = self.dungeon.pos, self.dungeon.size
 
-            distance_from_center = (x_pos - bright_spot["center"][0]) ** 2 + (y_pos - bright_spot["center"][1]) ** 2
-            light_mask = (distance_from_center < max_distance)  # [bool] array
-            brightness = ((1 - (distance_from_center[light_mask] / max_distance) ** gradient)
-                          * self.darkness_intensity * bright_spot["intensity"])
+        # darkness must remain on top of the walls and lights placed afterward on the same canvas
+        canvas_after = self.dungeon.canvas.after
+        if len(canvas_after.children) == 0 or canvas_after.children[-1] is not self.darkness_instruction:
+            if self.darkness_instruction in canvas_after.children:
+                canvas_after.remove(self.darkness_instruction)
+            canvas_after.add(self.darkness_instruction)
 
-            temp_data = data[light_mask, 3].astype(int16) - brightness.astype(int16)
-            data[light_mask, 3] = clip(temp_data, 0, self.darkness_intensity).astype(uint8)
+        self.dungeon.canvas.ask_update()  # same texture object, content changed
 
-        texture.blit_buffer(data.flatten(), colorfmt="rgba", bufferfmt="ubyte")
+    def _get_darkness_instruction(self) -> Rectangle | RenderContext:
+        """
+        Returns the instruction drawing DarknessManager.darkness according to DarknessManager.texture_format
+        :return: DarknessManager.darkness or a RenderContext containing it
+        """
+        match self.texture_format:
+            case "rgba":
+                return self.darkness
+            case "luminance":
+                render_context = RenderContext(use_parent_projection=True, use_parent_modelview=True,
+                                               use_parent_frag_modelview=True)
+                render_context.shader.fs = ALPHA_MASK_SHADER
+                if not render_context.shader.success:
+                    self.texture_format, self.texture = "rgba", None
+                    return self.darkness
+                render_context.add(self.darkness)
+                return render_context
+            case _:
+                raise ValueError(f"Invalid texture_format {self.texture_format}. Valid are: luminance, rgba.")
+
+    def get_resolution_scale(self) -> float:
+        """
+        Returns the resolution of the darkness mask relative to DungeonLayout.size, as set in
+        MineMadnessApp.darkness_resolution. If set to 0, it is chosen according to the Window size: small windows
+        render it at full resolution, while large windows (high-DPI devices) render it at half of the resolution, as
+        the mask is a smooth gradient. In both cases it is lowered by DarknessManager.governor if rendering does not
+        fit in the frame budget
+        :return: scale of the darkness mask (1 is full resolution)
+        """
+        scale: float = App.get_running_app().darkness_resolution
+        if scale <= 0:
+            scale = 0.5 if max(Window.size) > 1280 else 1.0
+
+        return scale * self.governor.scale_modifier
+
+    def _get_surface(self) -> tuple[Texture, ndarray]:
+        """
+        Returns the texture of the darkness layer and its pixel buffer. Both are reused across frames and only
+        created again if the size of the DungeonLayout or the resolution scale changes. The texture is rendered at
+        reduced resolution and stretched by the GPU over the DungeonLayout
+        :return: texture and view of the alpha of the buffer, of shape (height, width)
+        """
+        self.scale = self.get_resolution_scale()
+        size: tuple[int, int] = (max(1, ceil(self.dungeon.width * self.scale)),
+                                 max(1, ceil(self.dungeon.height * self.scale)))
+
+        if self.texture is None or self.texture.size != size:
+            self.texture = Texture.create(size=size, colorfmt=self.texture_format)
+            self.texture.mag_filter = "linear"  # smooth upscaling of the mask
+            match self.texture_format:
+                case "luminance":
+                    self.buffer = zeros((size[1], size[0]), dtype=uint8)
+                case "rgba":
+                    self.buffer = zeros((size[1], size[0], 4), dtype=uint8)  # only alpha channel is written
+
+        return self.texture, self.buffer if self.buffer.ndim == 2 else self.buffer[:, :, 3]
+
+    def generate_darkness_layer(self) -> Texture:
+        """
+        Generates a darkness layer with optional illuminated areas, rendered into DarknessManager.texture
+        :return: texture of the darkness layer
+        """
+        texture, alpha = self._get_surface()
+        flickering: bool = App.get_running_app().flickering_torches_on
+        frame: ndarray = self.get_flicker_frame(flickering)
+
+        if len(self.timed_spots) == 0 and self.buffer.ndim == 2:
+            pixels: ndarray = frame  # uploaded as stored, so a tick only costs the upload
+        else:
+            # only the timed bright spots (e.g. explosions) are composited on each frame, over a copy of the stored
+            # frame. "rgba" always copies, as stored frames only hold the alpha
+            alpha[:] = frame
+            for _, _, bright_spot in self.timed_spots:
+                self._composite_bright_spot(alpha, bright_spot)
+            pixels = self.buffer
+
+        # pixels are C-contiguous, so reshape() returns a view of them and nothing is copied before the upload
+        texture.blit_buffer(pixels.reshape(-1), colorfmt=self.texture_format, bufferfmt="ubyte")
+
+        return texture
+
+    @staticmethod
+    def is_dynamic(bright_spot: BrightSpot, flickering: bool) -> bool:
+        """
+        Determines if a bright spot changes between frames
+        :param bright_spot: BrightSpot of a light Token
+        :param flickering: True if flickering torches are on
+        :return: True if the bright spot is composited on the flicker frames, False if on the static layer
+        """
+        return flickering and bright_spot.flickers
+
+    def get_static_layer(self, flickering: bool) -> ndarray:
+        """
+        Returns the alpha of the darkness with all the static bright spots composited. It is only rebuilt after
+        DarknessManager.update_bright_spots() or if the flickering setting or the size of the texture change
+        :param flickering: True if flickering torches are on
+        :return: uint8 array of shape (height, width)
+        """
+        key: tuple = (flickering, self.texture.size, self.scale, self.darkness_intensity)
+
+        if self.static_layer is None or self.static_layer_key != key:
+            self.static_layer = full((self.texture.height, self.texture.width), self.darkness_intensity, dtype=uint8)
+            self.static_layer_key = key
+            self.flicker_frames = [None] * FLICKER_FRAMES
+            self.built_layers += 1
+            for bright_spot in self.bright_spots:
+                if not self.is_dynamic(bright_spot, flickering):
+                    self._composite_bright_spot(self.static_layer, bright_spot)
+
+        return self.static_layer
+
+    def get_flicker_frame(self, flickering: bool) -> ndarray:
+        """
+        Returns the next frame of the flicker loop: alpha of the darkness with the static layer and the
+        flickering BrightSpots composited. Each frame is only rendered the first time it is played,
+        so once the loop is complete flickering costs no compositing until the light set changes
+        :param flickering: True if flickering torches are on
+        :return: uint8 array of shape (height, width)
+        """
+        static_layer = self.get_static_layer(flickering)  # clears the loop if the static layer is rebuilt
+        if not flickering:
+            return static_layer
+
+        self.flicker_index = (self.flicker_index + 1) % FLICKER_FRAMES
+        frame = self.flicker_frames[self.flicker_index]
+
+        if frame is None:
+            frame = static_layer.copy()
+            for bright_spot in self.bright_spots:
+                if self.is_dynamic(bright_spot, flickering):
+                    self._composite_bright_spot(frame, bright_spot)
+            self.flicker_frames[self.flicker_index] = frame
+            self.built_layers += 1
+
+        return frame
+
+    def _composite_bright_spot(self, alpha_layer: ndarray, bright_spot: BrightSpot) -> None:
+        """
+        Subtracts the brightness of a bright spot from the alpha of the darkness, only within its bounding box.
+        Uses the engine set in DarknessManager.light_engine
+        :param alpha_layer: alpha of the darkness, of shape (height, width). Modified in place
+        :param bright_spot: BrightSpot to composite
+        :return: None
+        """
+        # flicker exponent is quantised so the falloff is read from a precomputed table
+        gradient = get_flicker_gradient(bright_spot.gradient)
+        kernel = get_light_kernel((bright_spot.center[0] * self.scale, bright_spot.center[1] * self.scale),
+                                  bright_spot.radius * self.scale, alpha_layer.shape[1], alpha_layer.shape[0])
+        table = get_falloff_table(gradient, bright_spot.intensity, self.darkness_intensity)
 
-        return Rectangle(texture=texture, pos=self.dungeon.pos, size=self.dungeon.size)
\ No newline at end of file
+        match self.light_engine:
+            case "cython":
+                compiled_composite_bright_spot(alpha_layer, kernel, table, self.darkness_intensity)
+            case "python":
+                composite_bright_spot(alpha_layer, kernel, table, self.darkness_intensity)
+            case _:
+                raise ValueError(f"Invalid light_engine {self.light_engine}. Valid are: cython, python.")
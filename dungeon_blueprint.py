@@ -1,12 +1,14 @@
 from collections import deque
-from random import choice
+from random import sample, shuffle, randrange
+from numpy import zeros, uint8, nonzero, ndarray, ogrid, minimum, maximum
 from items_kinds import get_item_kind
 
 
 class Blueprint:
     """
     Program-agnostic module to generate ASCII-based blueprints of dungeon rooms.
-    Supports multiple item kinds per position
+    Supports multiple item kinds per position: items are stored in one plane per item kind, holding the code of the
+    char of the item on each position (0 if there is none), so queries over the whole grid are vectorised
     """
 
     def __init__(self, y_axis: int | None = None, x_axis: int | None = None, layout:list[list] | None = None):
@@ -23,7 +25,6 @@ class Blueprint:
                                                             "treasure": None,
                                                             "exit": None
                                                         }
-        self.layout: list[list] | None = layout
         if x_axis is not None and y_axis is not None:
             self.y_axis: int = y_axis
             self.x_axis: int = x_axis
@@ -32,14 +33,12 @@ class Blueprint:
             self.x_axis: int = len(layout[0])
         self.area: int = self.y_axis * self.x_axis
 
-        self.post_init()
+        self.planes: dict[str, ndarray] = {item_kind: zeros((self.y_axis, self.x_axis), dtype=uint8)
+                                           for item_kind in self.position_template}
+        self.occupied: ndarray = zeros((self.y_axis, self.x_axis), dtype=bool)  # True if any item is on the position
 
-    def post_init(self) -> None:
-        """
-        This is defined as post_init because it needs self.position_template to be initialized
-        """
-        if self.layout is None:
-            self._generate_empty_layout()
+        if layout is not None:
+            self._load_layout(layout)
 
     @staticmethod
     def get_distance(position1: tuple[int, int], position2: tuple[int, int]) -> int:
@@ -51,12 +50,28 @@ class Blueprint:
         """
         return abs(position1[0] - position2[0]) + abs(position1[1] - position2[1])
 
-    def _generate_empty_layout(self) -> None:
+    def _load_layout(self, layout: list[list[dict]]) -> None:
+        """
+        Places the items of a layout as stored in saved games (see Blueprint.layout)
+        :param layout: grid of positions, each one a dict with the item of each item kind (None if no item)
+        :return: None
         """
-        Creates an empty grid of points of the specified dimensions
-        :return: grid of points
+        for y, row in enumerate(layout):
+            for x, position in enumerate(row):
+                for item in position.values():
+                    if item is not None:
+                        self.place_item(item, (y, x))
+
+    @property
+    def layout(self) -> list[list[dict]]:
         """
-        self.layout = [[self.position_template.copy() for _ in range(self.x_axis)] for _ in range(self.y_axis)]
+        Grid of positions as stored in saved games: one dict per position with the item of each item kind (None
+        if no item)
+        """
+        rows: dict[str, list[list[int]]] = {item_kind: plane.tolist() for item_kind, plane in self.planes.items()}
+        return [[{item_kind: chr(rows[item_kind][y][x]) if rows[item_kind][y][x] else None for item_kind in rows}
+                 for x in range(self.x_axis)]
+                for y in range(self.y_axis)]
 
     def _generate_spot_list(self) -> list[tuple[int, int]]:
         """
@@ -65,12 +80,31 @@ class Blueprint:
         """
         return [(y, x) for y in range(self.y_axis) for x in range(self.x_axis)]
 
+    def _generate_shuffled_spots(self, mask: ndarray | None = None) -> list[tuple[int, int]]:
+        """
+        Returns the coordinates of the spots of the grid in random order. Placement methods draw candidates from it
+        one after another, which is the same as drawing them at random without replacement
+        :param mask: boolean plane of the spots to include. If not specified, all spots are included
+        :return: shuffled list of coordinates
+        """
+        if mask is None:
+            spots = self._generate_spot_list()
+        else:
+            rows, cols = nonzero(mask)
+            spots = list(zip(rows.tolist(), cols.tolist()))
+        shuffle(spots)
+        return spots
+
     def to_dict(self) -> dict:
         """
         Converts the instance of the class to a dictionary
-        :return: dictionary containing all attributes of the instance and their values
+        :return: dictionary containing all attributes of the instance and their values, in the format of saved games
         """
-        return{key: value for key, value in vars(self).items()}
+        return {"position_template": self.position_template.copy(),
+                "layout": self.layout,
+                "y_axis": self.y_axis,
+                "x_axis": self.x_axis,
+                "area": self.area}
 
     def get_position(self, position:tuple[int,int]) -> dict:
         """
@@ -78,7 +112,50 @@ class Blueprint:
         :param position: coordinates of the position whose value must be returned
         :return: contents of the specified position
         """
-        return self.layout[position[0]][position[1]]
+        return {item_kind: self.get_item(position, item_kind) for item_kind in self.planes}
+
+    def get_item(self, position: tuple[int, int], item_kind: str) -> str | None:
+        """
+        Returns the item of the specified kind at the specified position
+        :param position: coordinates of the position
+        :param item_kind: kind of the item
+        :return: char of the item, None if there is no item of that kind
+        """
+        code = int(self.planes[item_kind][position])
+        return chr(code) if code else None
+
+    def get_mask(self, item_kinds: list[str]) -> ndarray:
+        """
+        Returns a boolean plane which is True on the positions having an item of ONE of the item_kinds
+        :param item_kinds: item kinds to consider
+        :return: boolean array of shape (y_axis, x_axis)
+        """
+        mask = zeros((self.y_axis, self.x_axis), dtype=bool)
+        for item_kind in item_kinds:
+            mask |= self.planes[item_kind] > 0
+        return mask
+
+    def get_positions(self, item_kinds: list[str], exclude: bool = False) -> list[tuple[int, int]]:
+        """
+        Returns the coordinates of the positions having none (exclude set to True) or at least one (exclude set to
+        False) of the items of the specified item_kinds
+        :param item_kinds: item kinds to consider
+        :param exclude: determines if search is exclusive or inclusive
+        :return: list of coordinates, sorted by row and column
+        """
+        mask = self.get_mask(item_kinds)
+        if exclude:
+            mask = ~mask
+        rows, cols = nonzero(mask)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def get_free_positions(self) -> list[tuple[int, int]]:
+        """
+        Returns the coordinates of all the free positions
+        :return: list of coordinates, sorted by row and column
+        """
+        rows, cols = nonzero(~self.occupied)
+        return list(zip(rows.tolist(), cols.tolist()))
 
     def has_item(self, position:tuple[int,int], item: str) -> bool:
         """
@@ -86,7 +163,7 @@ class Blueprint:
         :item: char of the item to check
         :return: True if it has the item, False otherwise
         """
-        return self.get_position(position)[get_item_kind(item)] == item
+        return bool(self.planes[get_item_kind(item)][position] == ord(item))
 
     def has_item_kind(self, position:tuple[int,int], item_kind: str) -> bool:
         """
@@ -94,7 +171,7 @@ class Blueprint:
         :item_kind: kind of the item to check
         :return: True if it has the item, False otherwise
         """
-        return self.get_position(position)[item_kind] is not None
+        return bool(self.planes[item_kind][position] != 0)
 
     def position_is_free(self, position:tuple[int,int]) -> bool:
         """
@@ -102,7 +179,7 @@ class Blueprint:
         :param position: coordinates of the position
         :return: True if the position is free, False otherwise
         """
-        return all(value is None for value in self.get_position(position).values())
+        return not self.occupied[position]
 
     def place_item(self, item:str, position: tuple[int,int]) -> None:
         """
@@ -111,7 +188,8 @@ class Blueprint:
         :param position: coordinates of the position where to place the item
         :return: None
         """
-        self.get_position(position)[get_item_kind(item)] = item
+        self.planes[get_item_kind(item)][position] = ord(item)
+        self.occupied[position] = True
 
     def place_items(self, item: str, number_of_items: int = 1) -> None:
         """
@@ -121,17 +199,10 @@ class Blueprint:
         :param number_of_items: number of items to place
         :return: None
         """
-        available_spots: list[tuple[int,int]] = self._generate_spot_list()
+        free_spots: list[tuple[int,int]] = self.get_free_positions()
 
-        for _ in range(number_of_items):
-            if len(available_spots) == 0:
-                break
-            while len(available_spots) > 0:
-                spot: tuple[int,int] = choice(available_spots)
-                available_spots.remove(spot)
-                if self.position_is_free(spot):
-                    self.place_item(item, spot)
-                    break
+        for spot in sample(free_spots, max(0, min(number_of_items, len(free_spots)))):
+            self.place_item(item, spot)
 
     def place_items_as_group(self, items: list, min_dist: int, max_dist: int | None = None,
                              position: tuple[int, int] | None = None, scatter:bool = True) -> None:
@@ -147,30 +218,29 @@ class Blueprint:
         :return: None
         """
         items = deque(items)
-        available_spots: list[tuple[int,int]] = self._generate_spot_list()
 
         if position is None:
-            position: tuple[int,int] = choice(available_spots)
-
-        self.place_item(items.popleft(), position)
-        placed_positions = {position}
-        available_spots.remove(position)
+            position: tuple[int,int] = (randrange(self.y_axis), randrange(self.x_axis))
 
         max_dist = max_dist if max_dist is not None and max_dist >= min_dist else min_dist
 
-        while len(available_spots) > 0 and len(items) > 0:
-            cand_position = choice(available_spots)
-            available_spots.remove(cand_position)
-
-            if not all(min_dist <= self.get_distance(cand_position, p) for p in placed_positions):
-                continue
+        # distances from each spot to the nearest and to the farthest placed item, updated on each placement
+        y_pos, x_pos = ogrid[0:self.y_axis, 0:self.x_axis]
+        distances = abs(y_pos - position[0]) + abs(x_pos - position[1])
+        min_distances, max_distances = distances, distances
+        self.place_item(items.popleft(), position)
 
-            if not (any(self.get_distance(cand_position, p) <= max_dist for p in placed_positions) if scatter
-            else all(self.get_distance(cand_position, p) <= max_dist for p in placed_positions)):
-                    continue
+        while len(items) > 0:
+            valid = (min_distances >= max(min_dist, 1)) & ((min_distances if scatter else max_distances) <= max_dist)
+            rows, cols = nonzero(valid)
+            if len(rows) == 0:  # no spot keeps the distances, remaining items are skipped
+                break
 
-            placed_positions.add(cand_position)
-            self.place_item(items.popleft(), cand_position)
+            index = randrange(len(rows))
+            position = (int(rows[index]), int(cols[index]))
+            distances = abs(y_pos - position[0]) + abs(x_pos - position[1])
+            min_distances, max_distances = minimum(min_distances, distances), maximum(max_distances, distances)
+            self.place_item(items.popleft(), position)
 
 
     def place_items_on_top_shuffled(self, numbers_of_items: dict[str,int], on_top_kind: str,
@@ -184,24 +254,30 @@ class Blueprint:
         :param skip: list of items chars of items of on_top_kind on which nothing should be placed
         :return: dictionary with the number of items placed
         """
-        available_spots = self._generate_spot_list()
         placed_items: dict[str, int] = {item: 0 for item in numbers_of_items}
         total_items = sum(numbers_of_items.values())
         if skip is None:
             skip = []
 
+        # spots without on_top_kind or with skipped items are never valid, so they are left out of the candidates
+        mask = self.get_mask([on_top_kind])
+        for skipped_item in skip:
+            mask &= self.planes[get_item_kind(skipped_item)] != ord(skipped_item)
+        available_spots = self._generate_shuffled_spots(mask)
+        next_spot: int = 0
+
         for _ in range(total_items):
+            if next_spot == len(available_spots):
+                break
             for item, number in numbers_of_items.items():
                 if placed_items[item] >= number:
                     continue
 
-                while len(available_spots) > 0:
-                    spot = choice(available_spots)
-                    available_spots.remove(spot)
+                while next_spot < len(available_spots):
+                    spot = available_spots[next_spot]
+                    next_spot += 1
 
-                    if (self.has_item_kind(spot, on_top_kind)
-                            and not self.has_item_kind(spot, get_item_kind(item))
-                            and not any(self.has_item(spot, skipped_item) for skipped_item in skip)):
+                    if not self.has_item_kind(spot, get_item_kind(item)):
                         self.place_item(item, spot)
                         placed_items[item] += 1
                         break
@@ -4,12 +4,13 @@ from kivy.graphics import Color
 from kivy.properties import NumericProperty, ListProperty
 from kivy.uix.gridlayout import GridLayout
 
-from collections import deque
 from random import choice
 
 import players
 import monsters
 from darkness_manager import DarknessManager
+from path_finder import PathFinder, DistanceField, FleeMap, FlowField
+from occupancy_index import OccupancyIndex
 from player_class import Player
 import trap_class as traps
 import tile_classes as tiles
@@ -17,8 +18,6 @@ from game_stats import DungeonStats
 from dungeon_blueprint import Blueprint
 from tokens_solid import CharacterToken
 
-# import cythonized_lights as cl
-
 class DungeonLayout(GridLayout):
     """
     Class defining the board of the game. The level is determined by the MineMadnessGame class. The rest of
@@ -31,6 +30,7 @@ class DungeonLayout(GridLayout):
     def __init__(self, game: MineMadnessGame,
                  blueprint: Blueprint | None = None,
                  torches_dict: dict | None = None,
+                 search_engine: str = "bfs",
                  **kwargs):
         super().__init__(**kwargs)
 
@@ -46,9 +46,11 @@ class DungeonLayout(GridLayout):
             self.blueprint = blueprint
 
         self.tiles_dict: dict[tuple, Tile] | None = None
+        self.occupancy: OccupancyIndex = OccupancyIndex(self.rows, self.cols)  # updated by Tile.set/remove_token()
         self.moving_token: CharacterToken | None = None  # CharacterTokens are not associated to any Tile while sliding
 
         self.dm: DarknessManager = DarknessManager(self, torches_dict=torches_dict)
+        self.pf: PathFinder = PathFinder(self, engine=search_engine)  # "bfs", "a_star" or "bidirectional"
 
     @staticmethod
     def on_damage_tokens(dungeon, damage_tokens) -> None:
@@ -84,12 +86,15 @@ class DungeonLayout(GridLayout):
         #blueprint.place_items("H", 1)
 
         ### COMMENT THE FOLLOWING LINES TO AVOID PLACING STUFF TO THE DUNGEON
+        # walls and non walls must come from the same draw of frequencies
+        frequencies: dict[str, dict] = self.stats.level_progression()
+
         # place everything but walls
-        for item, frequency in self.stats.level_progression()["non_walls"].items():
+        for item, frequency in frequencies["non_walls"].items():
             blueprint.place_items(item=item, number_of_items=int(frequency*blueprint.area))
 
         # place walls on top of pickables except jerkys, shovels and weapons
-        numbers_of_walls: dict[str, int] = {key: int(value * blueprint.area) for key, value in self.stats.level_progression()["walls"].items()}
+        numbers_of_walls: dict[str, int] = {key: int(value * blueprint.area) for key, value in frequencies["walls"].items()}
         placed_walls: dict = blueprint.place_items_on_top_shuffled(numbers_of_walls, on_top_kind="pickable", skip=["j", "p", "x"])
 
         # place remaining walls as usual
@@ -126,6 +131,9 @@ class DungeonLayout(GridLayout):
         for tile in self.children:
 
             tile_position = (tile.row, tile.col)
+            if self.blueprint.position_is_free(tile_position):
+                continue
+
             characters: list [Character] = []
             token_kinds: list [str] = []
             token_species: list [str] = []
@@ -332,6 +340,9 @@ class DungeonLayout(GridLayout):
         if self.dm.flickering_torches is not None:
             self.dm.flickering_torches.cancel()
             self.dm.flickering_torches = None
+        if self.dm.expiring_spots is not None:
+            self.dm.expiring_spots.cancel()
+            self.dm.expiring_spots = None
 
         for tile in self.children:
             token: CharacterToken | None = None
@@ -363,10 +374,7 @@ class DungeonLayout(GridLayout):
 
             # if dungeon.bright_spots does not change its values, darkness must be cast manually
             if len(dungeon.dm.bright_spots) == 0:
-                with dungeon.canvas.after:
-                    # uncomment this to run the cythonized version
-                    # dungeon.darkness = cl.generate_darkness_layer(dungeon, dungeon.darkness_intensity)
-                    dungeon.darkness = dungeon.dm.generate_darkness_layer()
+                dungeon.dm.cast_darkness()
 
     def hide_penumbras(self) -> None:
         """
@@ -374,8 +382,8 @@ class DungeonLayout(GridLayout):
         Player within reachable range
         :return: None
         """
-        for tile in self.children:
-            if tile.has_token("monster", "penumbra"):
+        for position in self.scan_tiles(["monster"]):
+            if (tile := self.get_tile(position)).has_token("monster", "penumbra"):
                 character = tile.get_token("monster").character
                 character.hide_if_player_in_range(character.stats.moves)  # remaining moves not yet established
 
@@ -426,8 +434,7 @@ class DungeonLayout(GridLayout):
         :param position_2: second position
         :return: True if they are nearby, False otherwise
         """
-        directions = (-1, 0), (1, 0), (0, -1), (0, 1)
-        return any((position_1[0] + dx, position_1[1] + dy) == position_2 for dx, dy in directions)
+        return abs(position_1[0] - position_2[0]) + abs(position_1[1] - position_2[1]) == 1
 
     def check_if_connexion(self, position_1: tuple[int, int], position_2: tuple[int, int],
                            obstacles_kinds: list[str], num_of_steps: int) -> bool:
@@ -484,13 +491,7 @@ class DungeonLayout(GridLayout):
         :param position: coordinates of the position
         :return: set of nearby positions
         """
-        directions = (0, 1), (0, -1), (1, 0), (-1, 0)
-
-        return {
-            (position[0] + dx, position[1] + dy)
-            for dx, dy in directions
-            if self.check_within_limits((position[0] + dx, position[1] + dy))
-        }
+        return self.pf.get_nearby_positions(position)
 
     def get_nearby_spaces(self, position: tuple[int, int], token_kinds: list[str]) -> set[tuple[int, int]]:
         """
@@ -518,42 +519,11 @@ class DungeonLayout(GridLayout):
         :param steps: number of steps from the central position
         :return: set with the coordinates of all positions within the range
         """
-        mov_range: set = self._get_horizontal_range(position, steps)  # row where token is
-
-        vertical_shift: int = 1
-        for lateral_steps in range(steps, 0, -1):  # 0 is not inclusive but Token row is already added
-
-            y_position: int = position[0] - vertical_shift  # move upwards
-            if y_position >= 0:
-                # lateral steps -1 because one character step is spent to go up or down
-                mov_range = mov_range.union(self._get_horizontal_range((y_position, position[1]), lateral_steps - 1))
-
-            y_position = position[0] + vertical_shift  # move downwards
-            if y_position < self.rows:
-                mov_range = mov_range.union(self._get_horizontal_range((y_position, position[1]), lateral_steps - 1))
-
-            vertical_shift += 1
-
-        return mov_range
-
-    def _get_horizontal_range(self, position: tuple[int, int], lateral_steps: int) -> set[tuple[int, int]]:
-        """
-        Returns the coordinates of the positions within a row defined by a central position and a range of steps
-        to each side
-        :param position: central position of the row
-        :param lateral_steps: number of steps to take to each side
-        :return: set with all the coordinates within the row
-        """
-        horizontal_range: set = set()
-
-        for step in range(0, lateral_steps + 1):
-            if position[1] - step >= 0:
-                horizontal_range.add((position[0], position[1] - step))  # add whole row left
-
-            if position[1] + step < self.cols:
-                horizontal_range.add((position[0], position[1] + step))  # add whole row right
-
-        return horizontal_range
+        return {(row, col)
+                for row in range(max(0, position[0] - steps), min(self.rows, position[0] + steps + 1))
+                # one step of the range is spent for each row moved upwards or downwards
+                for lateral_steps in (steps - abs(row - position[0]),)
+                for col in range(max(0, position[1] - lateral_steps), min(self.cols, position[1] + lateral_steps + 1))}
 
     def disable_all_tiles(self):
         """
@@ -570,9 +540,11 @@ class DungeonLayout(GridLayout):
         :param active_character: current active Player in the game
         :return: None
         """
+        reach_field: DistanceField = self.get_reach_field(active_character)  # one search serves all the tiles
+
         for position in tile_positions:
             tile = self.get_tile(position)
-            tile.disabled = not tile.check_if_enable(active_character)
+            tile.disabled = not tile.check_if_enable(active_character, reach_field)
 
     def scan_tiles(self, token_kinds: list[str], exclude: bool = False) -> set[tuple[int:int]]:
         """
@@ -584,12 +556,7 @@ class DungeonLayout(GridLayout):
         Token of ONE of the token_kind provided)
         :return: set with the coordinates of the tiles.
         """
-        if exclude:
-            return {tile.position for tile in self.children if
-                    not any(tile.has_token(token) for token in token_kinds)}
-        else:
-            return {tile.position for tile in self.children if
-                    any(tile.has_token(token) for token in token_kinds)}
+        return self.occupancy.get_positions(token_kinds, exclude)
 
     def find_shortest_path(
             self, start_tile_position: tuple[int, int], end_tile_position: tuple[int, int],
@@ -604,34 +571,137 @@ class DungeonLayout(GridLayout):
         :param excluded: Token.kinds that should be avoided as they block the path
         :return: path to target if possible, otherwise list with one element [start_tile_position]
         """
-        directions: tuple = (-1, 0), (1, 0), (0, -1), (0, 1)
-        queue: deque = deque(
-            [(start_tile_position, [start_tile_position])]
-        )
-
-        excluded_positions: set[tuple] = {start_tile_position}
-        if excluded is not None:
-            excluded_positions = excluded_positions | self.scan_tiles(excluded)
-        if end_tile_position in excluded_positions:
-            excluded_positions.remove(end_tile_position)
-
-        excluded_positions = self._filter_excluded_positions(excluded_positions)
+        path: list[tuple] = self.pf.get_cached(
+            ("shortest_path", self.pf.engine, start_tile_position, end_tile_position, frozenset(excluded or ())),
+            lambda: self._search_shortest_path(start_tile_position, end_tile_position, excluded))
 
-        while len(queue) > 0:
-            current_position, path = queue.popleft()
+        return list(path)  # callers may trim the path, cached one must remain untouched
 
-            if current_position == end_tile_position:
-                return path
+    def _search_shortest_path(
+            self, start_tile_position: tuple[int, int], end_tile_position: tuple[int, int],
+            excluded: list[str] | None = None
+    ) -> list[tuple]:
+        """
+        Searches the shortest path from start_tile to end_tile. See DungeonLayout.find_shortest_path()
+        :param start_tile_position: coordinates of the starting tile
+        :param end_tile_position: coordinates of the end tile
+        :param excluded: Token.kinds that should be avoided as they block the path
+        :return: path to target if possible, otherwise list with one element [start_tile_position]
+        """
+        return self.pf.shortest_path(start_tile_position, end_tile_position, self._get_blocked_positions(excluded))
+
+    def distance_field(self, origin: tuple[int, int], blocked_kinds: list[str] | None = None,
+                       max_steps: int | None = None) -> DistanceField:
+        """
+        Runs a single search from origin and returns the distances and predecessors of all reachable positions.
+        Paths read from the DistanceField are the same returned by DungeonLayout.find_shortest_path()
+        :param origin: coordinates of the origin of the search
+        :param blocked_kinds: Token.kinds that should be avoided as they block the path
+        :param max_steps: if specified, the search stops at this number of steps from origin
+        :return: DistanceField of the origin
+        """
+        return self.pf.get_cached(("distance_field", origin, frozenset(blocked_kinds or ()), max_steps),
+                                  lambda: self.pf.distance_field(origin, self._get_blocked_positions(blocked_kinds),
+                                                                 max_steps))
+
+    def get_flee_map(self, sources: set[tuple[int, int]], blocked_kinds: list[str] | None = None) -> FleeMap:
+        """
+        Returns the path lengths from every position to each one of the sources, running one search per source
+        :param sources: coordinates of the positions to flee from
+        :param blocked_kinds: Token.kinds that block the path
+        :return: FleeMap of the sources
+        """
+        sorted_sources: tuple[tuple[int, int], ...] = tuple(sorted(sources))
+        return self.pf.get_cached(("flee_map", sorted_sources, frozenset(blocked_kinds or ())),
+                                  lambda: self.pf.flee_map(sorted_sources,
+                                                           [self.distance_field(source, blocked_kinds)
+                                                            for source in sorted_sources]))
+
+    def find_token_within(self, origin: tuple[int, int], token_kind: str, blocked_kinds: list[str] | None = None,
+                          max_steps: int | None = None) -> tuple[int, int] | None:
+        """
+        Returns the position of a Token of token_kind reachable from origin within max_steps. A single search is
+        run, stopping at the first Token found, and Token positions are read from DungeonLayout.occupancy
+        :param origin: coordinates of the origin of the search
+        :param token_kind: Token.kind to look for
+        :param blocked_kinds: Token.kinds that block the path
+        :param max_steps: maximum number of steps (optional). If None, the whole DungeonLayout is explored
+        :return: coordinates of the first Token found, None if there is no reachable Token
+        """
+        return self.pf.get_cached(("token_within", origin, token_kind, frozenset(blocked_kinds or ()), max_steps),
+                                  lambda: self.pf.find_within(origin, self.scan_tiles([token_kind]),
+                                                              self._get_blocked_positions(blocked_kinds), max_steps))
+
+    def get_dig_field(self, origin: tuple[int, int], dig_costs: dict[str, int],
+                      blocked_kinds: list[str] | None = None) -> DistanceField:
+        """
+        Returns the DistanceField of a Character able to dig walls: walls do not block the path, entering a wall
+        costs the steps spent digging it plus the step itself. Distances of the DistanceField are costs
+        :param origin: coordinates of the origin of the search
+        :param dig_costs: steps spent digging a wall of each Token.species
+        :param blocked_kinds: Token.kinds that block the path
+        :return: DistanceField of the origin weighted by dig costs
+        """
+        return self.pf.get_cached(
+            ("dig_field", origin, tuple(sorted(dig_costs.items())), frozenset(blocked_kinds or ())),
+            lambda: self.pf.cost_field(origin,
+                                       {position: 1 + dig_costs[self.get_tile(position).get_token("wall").species]
+                                        for position in self.scan_tiles(["wall"])},
+                                       self._get_blocked_positions(blocked_kinds)))
+
+    def get_chase_field(self, token_kind: str, blocked_kinds: list[str] | None = None) -> FlowField:
+        """
+        Returns the FlowField toward all the visible (not hidden) Tokens of token_kind. It is shared by all the
+        Characters chasing token_kind with the same blocking Token.kinds and only rebuilt when the chased or the
+        blocking positions change
+        :param token_kind: Token.kind being chased
+        :param blocked_kinds: Token.kinds that block the path
+        :return: FlowField toward the Tokens of token_kind
+        """
+        sources: frozenset[tuple[int, int]] = frozenset(
+            position for position in self.scan_tiles([token_kind])
+            if (character := self.get_tile(position).get_token(token_kind).character) is None
+            or not character.is_hidden)
+
+        return self.pf.chase_field((token_kind, frozenset(blocked_kinds or ())), sources,
+                                   frozenset(self._get_blocked_positions(blocked_kinds)))
+
+    def prepare_chase_fields(self, characters: list[Character]) -> None:
+        """
+        Builds the FlowFields of the characters at the start of their turn, one per distinct chased Token.kind and
+        blocking Token.kinds. Characters moving later in the turn reuse them while their sources and obstacles stay
+        :param characters: Characters that will chase during the turn
+        :return: None
+        """
+        for token_kind, blocked_kinds in {(character.chases, tuple(sorted(character.blocked_by)))
+                                          for character in characters}:
+            self.get_chase_field(token_kind, list(blocked_kinds))
 
-            for direction in directions:
-                # explore one step in all 4 directions
-                row, col = (current_position[0] + direction[0], current_position[1] + direction[1])
+    def get_reach_field(self, active_player: Player) -> DistanceField:
+        """
+        Returns the DistanceField of the positions the Player can reach this turn: walking within its remaining moves
+        or throwing dynamite within its shooting range
+        :param active_player: current active Player of the game
+        :return: DistanceField bounded to the reach of the Player
+        """
+        if active_player.using_dynamite:
+            return self.distance_field(active_player.get_position(),
+                                       [token_kind for token_kind in active_player.blocked_by
+                                        if token_kind != "trap"],  # traps do not block shooting
+                                       active_player.stats.shooting_range)
 
-                if 0 <= row < self.rows and 0 <= col < self.cols and (row, col) not in excluded_positions:
-                    excluded_positions.add((row, col))  # this may increase yield as it limits the number of paths
-                    queue.append(((row, col), path + [(row, col)]))
+        return self.distance_field(active_player.get_position(), active_player.blocked_by,
+                                   active_player.remaining_moves)
 
-        return [start_tile_position]
+    def _get_blocked_positions(self, blocked_kinds: list[str] | None) -> set[tuple[int, int]]:
+        """
+        Returns the positions blocking the path for the given Token.kinds
+        :param blocked_kinds: Token.kinds that block the path
+        :return: set with the coordinates of the blocking positions
+        """
+        if blocked_kinds is None or len(blocked_kinds) == 0:
+            return set()
+        return self._filter_excluded_positions(self.scan_tiles(blocked_kinds))
 
     def _filter_excluded_positions(self, excluded_positions: set[tuple]) -> set[tuple]:
         """
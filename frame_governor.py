@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+
+class FrameGovernor:
+    """
+    Keeps the darkness flicker within a frame budget. It measures how long each darkness frame takes to render and
+    how long the frames of the whole app take, and reacts in three steps: flicker ticks are skipped while the app
+    runs over the frame budget, the flicker interval grows while rendering takes more than its share of the budget
+    (and shrinks back when it is cheap again) and, if the interval is already at its maximum, the resolution of
+    the darkness mask is halved (and doubled back once rendering is cheap at the min interval).
+    The frame budget is a target: if skipping max_skips ticks in a row does not bring the app back within it, the
+    device does not reach it (e.g. its display refreshes slower), so the budget is taken from the measured frame time
+    and falls back toward the target as frame times recover
+    """
+
+    def __init__(self, target_fps: float = 15, min_fps: float = 5, frame_budget: float = 1 / 60,
+                 render_share: float = 0.5, min_scale_modifier: float = 0.25, smoothing: float = 0.2,
+                 max_skips: int = 4):
+        self.min_interval: float = 1 / target_fps  # flicker interval when rendering fits in the budget
+        self.max_interval: float = 1 / min_fps
+        self.target_frame_budget: float = frame_budget
+        self.frame_budget: float = frame_budget  # time of an app frame, in seconds
+        self.render_budget: float = frame_budget * render_share  # time a darkness frame may take to render
+        self.max_skips: int = max_skips  # flicker ticks skipped in a row before the frame budget is raised
+        self.min_scale_modifier: float = min_scale_modifier
+        self.smoothing: float = smoothing  # weight of each new measure in the moving averages (0 to 1)
+
+        self.interval: float = self.min_interval  # current time between flicker ticks, in seconds
+        self.scale_modifier: float = 1.0  # modifier of the resolution of the darkness mask
+        self.render_time: float | None = None  # moving average of the render time of a darkness frame
+        self.frame_time: float | None = None  # moving average of the time of an app frame
+        self.tick_time: float | None = None  # moving average of the time between rendered darkness frames
+        self.last_render_start: float | None = None
+        self.rendered_frames: int = 0
+        self.skipped_frames: int = 0
+        self.consecutive_skips: int = 0
+
+    def _average(self, average: float | None, value: float) -> float:
+        """
+        Updates an exponential moving average with a new value
+        :param average: current average, None if there is no measure yet
+        :param value: new measure
+        :return: updated average
+        """
+        return value if average is None else average + (value - average) * self.smoothing
+
+    def should_skip(self, frame_time: float) -> bool:
+        """
+        Records the time of the last app frame and determines if the current flicker tick must be skipped because
+        the app is already running over the frame budget. Sustained skipping raises the frame budget to the measured
+        frame time, so the darkness does not freeze on devices that never reach the budget, and the budget follows
+        the frame time back down to the target when it recovers
+        :param frame_time: time of the last app frame, in seconds
+        :return: True if the darkness frame must not be rendered, False otherwise
+        """
+        self.frame_time = self._average(self.frame_time, frame_time)
+        if self.frame_time <= self.frame_budget * 1.5:
+            self.consecutive_skips = 0
+            self.frame_budget = max(self.target_frame_budget, min(self.frame_budget, self.frame_time))
+            return False
+
+        if self.consecutive_skips < self.max_skips:
+            self.consecutive_skips += 1
+            self.skipped_frames += 1
+            return True
+
+        # the render budget is kept, rendering cost is still governed by FrameGovernor.record_render()
+        self.frame_budget = self.frame_time
+        self.consecutive_skips = 0
+        return False
+
+    def record_render(self, start: float, end: float, one_off: bool = False) -> None:
+        """
+        Records the render of a darkness frame and adjusts the flicker interval and the resolution modifier
+        :param start: time when the render started, in seconds
+        :param end: time when the render ended, in seconds
+        :param one_off: True if the frame built layers that are cached afterward (e.g. the static layer), so its
+        render time is not representative and is left out of the average
+        :return: None
+        """
+        if self.last_render_start is not None:
+            self.tick_time = self._average(self.tick_time, start - self.last_render_start)
+        self.last_render_start = start
+        self.rendered_frames += 1
+        if one_off:
+            return
+
+        self.render_time = self._average(self.render_time, end - start)
+
+        if self.render_time > self.render_budget:
+            if self.interval < self.max_interval:
+                self.interval = min(self.max_interval, self.interval * 1.25)
+            elif self.scale_modifier > self.min_scale_modifier:
+                self.scale_modifier = max(self.min_scale_modifier, self.scale_modifier / 2)
+                self.render_time = None  # measures at the previous resolution are no longer valid
+
+        elif self.render_time < self.render_budget / 2 and self.interval > self.min_interval:
+            self.interval = max(self.min_interval, self.interval / 1.25)
+
+        # doubling the resolution quadruples the pixels, so it must still fit in the budget afterward
+        elif self.render_time < self.render_budget / 4 and self.scale_modifier < 1.0:
+            self.scale_modifier = min(1.0, self.scale_modifier * 2)
+            self.render_time = None
+
+    def get_stats(self) -> dict[str, float | int]:
+        """
+        Returns the measures of the governor, so tooling can read how the darkness performs
+        :return: dictionary with the effective flicker fps, the average render and app frame times in milliseconds,
+        the current flicker interval and frame budget in milliseconds, the resolution modifier and the rendered and
+        skipped frames
+        """
+        return {"fps": 0.0 if not self.tick_time else 1 / self.tick_time,
+                "render_ms": 0.0 if self.render_time is None else self.render_time * 1000,
+                "frame_ms": 0.0 if self.frame_time is None else self.frame_time * 1000,
+                "interval_ms": self.interval * 1000,
+                "budget_ms": self.frame_budget * 1000,
+                "scale_modifier": self.scale_modifier,
+                "rendered": self.rendered_frames,
+                "skipped": self.skipped_frames}
@@ -5,6 +5,8 @@ from abc import ABC
 from random import randint, uniform
 from typing import ClassVar
 
+MAX_GROUP_DRAWS: int = 8  # draws of the frequencies of a group before scaling them into the group range
+
 
 class DungeonStats:
     """
@@ -15,6 +17,7 @@ class DungeonStats:
         self.stats_level = dungeon_level
         self.xp_end_level = 5
         self.max_total_freq: float = 0.8  # max total frequency of all items placed
+        self.frequency_draws: int = 0  # draws made by DungeonStats._sample_group(), for benchmarking
 
     @property
     def size(self) -> int:
@@ -117,7 +120,8 @@ class DungeonStats:
     def level_progression(self) -> dict[str,dict]:
         """
         Organizes in a dictionary the frequency of tokens in the level. Distinguises between walls (may be placed on
-         top of things) and non walls. Example:
+         top of things) and non walls. Each call draws new frequencies, so it must be called once per level and its
+         result reused. Example:
         {
             'non_walls':
                         {
@@ -134,76 +138,56 @@ class DungeonStats:
         }
         :return: dictionary with Token.char as key and monster frequency as value
         """
-        total_freq: float | None = None
-        while total_freq is None or total_freq > self.max_total_freq:
-
-            total_monster_freq: float | None = None
-            while (total_monster_freq is None or
-                   not MonsterStats.min_group_freq <= total_monster_freq <= MonsterStats.max_group_freq):
-                monster_frequencies = {
-                    KoboldStats.char: KoboldStats.calculate_frequency(self.stats_level),
-                    BlindLizardStats.char: BlindLizardStats.calculate_frequency(self.stats_level),
-                    BlackDeathStats.char: BlackDeathStats.calculate_frequency(self.stats_level),
-                    CaveHoundStats.char: CaveHoundStats.calculate_frequency(self.stats_level),
-                    GrowlStats.char: GrowlStats.calculate_frequency(self.stats_level),
-                    RockGolemStats.char: RockGolemStats.calculate_frequency(self.stats_level),
-                    DarkGnomeStats.char: DarkGnomeStats.calculate_frequency(self.stats_level),
-                    NightmareStats.char: NightmareStats.calculate_frequency(self.stats_level),
-                    LindWormStats.char: LindWormStats.calculate_frequency(self.stats_level),
-                    WanderingShadowStats.char: WanderingShadowStats.calculate_frequency(self.stats_level),
-                    DepthsWispStats.char: DepthsWispStats.calculate_frequency(self.stats_level),
-                    MountainDjinnStats.char: MountainDjinnStats.calculate_frequency(self.stats_level),
-                    PixieStats.char: PixieStats.calculate_frequency(self.stats_level),
-                    RattleSnakeStats.char: RattleSnakeStats.calculate_frequency(self.stats_level),
-                    PenumbraStats.char: PenumbraStats.calculate_frequency(self.stats_level),
-                    ClawJawStats.char: ClawJawStats.calculate_frequency(self.stats_level),
-                }
-                total_monster_freq = sum(monster_frequencies.values())
-
-            total_wall_freq: float | None = None
-            while (total_wall_freq is None or
-                   not WallStats.min_group_freq <= total_wall_freq <= WallStats.max_group_freq):
-                wall_frequencies = {
-                    RockWallStats.char: RockWallStats.calculate_frequency(self.stats_level),
-                    GraniteWallStats.char: GraniteWallStats.calculate_frequency(self.stats_level),
-                    QuartzWallStats.char: QuartzWallStats.calculate_frequency(self.stats_level)
-                }
-                total_wall_freq = sum(wall_frequencies.values())
-
-            total_weapon_shovel_freq: float | None = None
-            while (total_weapon_shovel_freq is None or
-                   not WeaponShovelStats.min_group_freq <= total_weapon_shovel_freq <= WeaponShovelStats.max_group_freq):
-                diggable_wall_frequency = wall_frequencies[RockWallStats.char] + wall_frequencies[GraniteWallStats.char]
-                weapon_shovel_frequencies = {
-                    ShovelStats.char: ShovelStats.calculate_frequency(diggable_wall_frequency),
-                    WeaponStats.char: WeaponStats.calculate_frequency(total_monster_freq)
-                }
-                total_weapon_shovel_freq = sum(weapon_shovel_frequencies.values())
-
-            total_item_freq: float | None = None
-            while (total_item_freq is None or
-                   not ItemStats.min_group_freq <= total_item_freq <= ItemStats.max_group_freq):
-                item_frequencies = {
-                    JerkyStats.char: JerkyStats.calculate_frequency(total_monster_freq),
-                    CoffeeStats.char: CoffeeStats.calculate_frequency(total_monster_freq),
-                    WhiskyStats.char: WhiskyStats.calculate_frequency(total_monster_freq),
-                    TobaccoStats.char: TobaccoStats.calculate_frequency(total_monster_freq),
-                }
-                total_item_freq = sum(item_frequencies.values())
-
-            total_trap_freq: float | None = None
-            while (total_trap_freq is None or
-                   not TrapStats.min_group_freq <= total_trap_freq <= TrapStats.max_group_freq):
-                trap_frequency = {
-                    TrapStats.char: TrapStats.calculate_frequency(self.stats_level)
-                }
-                total_trap_freq = sum(trap_frequency.values())
-
-            total_freq: float = (total_monster_freq +
-                                 total_wall_freq +
-                                 total_weapon_shovel_freq +
-                                 # total_item_freq + items don't count as they are mostly hidden
-                                 total_trap_freq)
+        monster_frequencies = self._sample_group([(KoboldStats, self.stats_level),
+                                                  (BlindLizardStats, self.stats_level),
+                                                  (BlackDeathStats, self.stats_level),
+                                                  (CaveHoundStats, self.stats_level),
+                                                  (GrowlStats, self.stats_level),
+                                                  (RockGolemStats, self.stats_level),
+                                                  (DarkGnomeStats, self.stats_level),
+                                                  (NightmareStats, self.stats_level),
+                                                  (LindWormStats, self.stats_level),
+                                                  (WanderingShadowStats, self.stats_level),
+                                                  (DepthsWispStats, self.stats_level),
+                                                  (MountainDjinnStats, self.stats_level),
+                                                  (PixieStats, self.stats_level),
+                                                  (RattleSnakeStats, self.stats_level),
+                                                  (PenumbraStats, self.stats_level),
+                                                  (ClawJawStats, self.stats_level)],
+                                                 MonsterStats.min_group_freq, MonsterStats.max_group_freq)
+
+        wall_frequencies = self._sample_group([(RockWallStats, self.stats_level),
+                                               (GraniteWallStats, self.stats_level),
+                                               (QuartzWallStats, self.stats_level)],
+                                              WallStats.min_group_freq, WallStats.max_group_freq)
+
+        trap_frequency = self._sample_group([(TrapStats, self.stats_level)],
+                                            TrapStats.min_group_freq, TrapStats.max_group_freq)
+
+        # weapons, shovels and items depend on the final monster and wall frequencies, so the independent groups
+        # are fitted first, leaving room for the weapons and shovels at their min total frequency
+        independent_groups = [(monster_frequencies, MonsterStats.min_group_freq),
+                              (wall_frequencies, WallStats.min_group_freq),
+                              (trap_frequency, TrapStats.min_group_freq)]
+        self._fit_total_frequency(independent_groups, self.max_total_freq - WeaponShovelStats.min_group_freq)
+        total_monster_freq: float = sum(monster_frequencies.values())
+
+        diggable_wall_frequency = wall_frequencies[RockWallStats.char] + wall_frequencies[GraniteWallStats.char]
+        weapon_shovel_frequencies = self._sample_group([(ShovelStats, diggable_wall_frequency),
+                                                        (WeaponStats, total_monster_freq)],
+                                                       WeaponShovelStats.min_group_freq,
+                                                       WeaponShovelStats.max_group_freq)
+
+        item_frequencies = self._sample_group([(JerkyStats, total_monster_freq),
+                                               (CoffeeStats, total_monster_freq),
+                                               (WhiskyStats, total_monster_freq),
+                                               (TobaccoStats, total_monster_freq)],
+                                              ItemStats.min_group_freq, ItemStats.max_group_freq)
+
+        # items don't count in the total as they are mostly hidden
+        self._fit_total_frequency([(weapon_shovel_frequencies, WeaponShovelStats.min_group_freq)],
+                                  self.max_total_freq - sum(sum(frequencies.values())
+                                                            for frequencies, _ in independent_groups))
 
         all_frequencies = {
                             "non_walls":
@@ -222,6 +206,53 @@ class DungeonStats:
         del monster_frequencies, wall_frequencies, weapon_shovel_frequencies, item_frequencies, trap_frequency
         return all_frequencies
 
+    def _sample_group(self, group: list[tuple[type, int | float]], min_freq: float, max_freq: float) -> dict[str, float]:
+        """
+        Draws the frequencies of a group of Stats until their total lies between min_freq and max_freq, at most
+        MAX_GROUP_DRAWS times. If none of the draws fits, the last one is scaled proportionally into the range, so
+        sampling always ends in bounded time
+        :param group: list of (Stats class, seed passed to its calculate_frequency())
+        :param min_freq: min total frequency of the group
+        :param max_freq: max total frequency of the group
+        :return: dictionary with Token.char as key and frequency as value
+        """
+        for _ in range(MAX_GROUP_DRAWS):
+            frequencies: dict[str, float] = {stats.char: stats.calculate_frequency(seed) for stats, seed in group}
+            self.frequency_draws += 1
+            total_freq = sum(frequencies.values())
+            if min_freq <= total_freq <= max_freq:
+                return frequencies
+
+        if total_freq == 0:  # nothing to scale, no Stats of the group can appear at this level
+            return frequencies
+
+        factor = (max_freq if total_freq > max_freq else min_freq) / total_freq
+        return {char: frequency * factor for char, frequency in frequencies.items()}
+
+    @staticmethod
+    def _fit_total_frequency(groups: list[tuple[dict[str, float], float]], max_total_freq: float) -> None:
+        """
+        Scales down the frequencies of the groups so that their grand total does not exceed max_total_freq.
+        The excess is taken from each group in proportion to how much it is above its min total frequency, so all
+        groups remain within their range
+        :param groups: list of (frequencies of the group, min total frequency of the group). Modified in place
+        :param max_total_freq: max grand total of the groups
+        :return: None
+        """
+        totals: list[float] = [sum(frequencies.values()) for frequencies, _ in groups]
+        excess: float = sum(totals) - max_total_freq
+        slacks: list[float] = [max(0.0, total - min_freq) for total, (_, min_freq) in zip(totals, groups)]
+        total_slack: float = sum(slacks)
+
+        if excess <= 0 or total_slack == 0:
+            return
+
+        for (frequencies, _), total, slack in zip(groups, totals, slacks):
+            if slack > 0:
+                factor = (total - slack * min(1.0, excess / total_slack)) / total
+                for char in frequencies:
+                    frequencies[char] *= factor
+
 @dataclass
 class WallStats(ABC):
     char: str | None = None
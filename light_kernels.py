@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from math import floor, ceil
+from random import randint
+from numpy import ogrid, sqrt, rint, linspace, minimum, clip, uint8, uint16, int16, ndarray
+
+FLICKER_LEVELS: int = 16  # number of distinct flicker exponents within the gradient of a flickering bright spot
+FALLOFF_BINS: int = 1024  # number of steps of normalised distance to the center stored in the falloff tables
+
+
+@dataclass(slots=True)
+class BrightSpot:
+    """
+    Area lit by a light Token or by a timed effect (e.g. explosions). Compared by value, so assigning an equal list
+    to DarknessManager.bright_spots does not trigger DarknessManager.on_bright_spots()
+    """
+    center: tuple[float, float]  # coordinates (x, y) of the center, in pixels of the DungeonLayout
+    radius: float
+    intensity: float  # 0 to 1
+    gradient: tuple[float, float]  # (min, max) of the exponent of the falloff (see get_flicker_gradient())
+
+    @property
+    def flickers(self) -> bool:
+        return self.gradient[0] != self.gradient[1]
+
+
+class LightKernel:
+    """
+    Pixels of the darkness layer lit by a bright spot: bounding box of its circle, mask of the pixels of the box
+    inside the circle and the index of the distance to the center of each pixel in the falloff tables.
+    It only depends on the center, the radius and the size of the darkness layer, so it is reused across frames
+    """
+
+    def __init__(self, center: tuple[float, float], radius: float, width: int, height: int):
+        x_start, x_end = max(0, floor(center[0] - radius)), min(width, ceil(center[0] + radius) + 1)
+        y_start, y_end = max(0, floor(center[1] - radius)), min(height, ceil(center[1] + radius) + 1)
+
+        self.rows: slice = slice(y_start, max(y_start, y_end))
+        self.cols: slice = slice(x_start, max(x_start, x_end))
+
+        y_pos, x_pos = ogrid[self.rows, self.cols]  # grid of coordinates of the pixels of the bounding box
+        distance_from_center = (x_pos - center[0]) ** 2 + (y_pos - center[1]) ** 2
+        max_distance = radius ** 2
+
+        self.mask: ndarray = distance_from_center < max_distance  # [bool] array of shape of the bounding box
+        # tables are indexed by distance (not squared) so steps are small where the falloff is steep. Pixels
+        # outside the circle get the last index, whose brightness is 0, so the whole box can be composited at once
+        self.index_map: ndarray = rint(sqrt(minimum(distance_from_center / max_distance, 1))
+                                       * (FALLOFF_BINS - 1)).astype(uint16)
+        self.indices: ndarray = self.index_map[self.mask]  # indices of the pixels inside the circle
+
+
+@lru_cache(maxsize=256)
+def get_light_kernel(center: tuple[float, float], radius: float, width: int, height: int) -> LightKernel:
+    """
+    Returns the LightKernel of a bright spot, computing it only the first time it is requested
+    :param center: coordinates (x, y) of the center of the bright spot, in pixels of the darkness layer
+    :param radius: radius of the bright spot, in pixels
+    :param width: width of the darkness layer
+    :param height: height of the darkness layer
+    :return: LightKernel of the bright spot
+    """
+    return LightKernel(center, radius, width, height)
+
+
+@lru_cache(maxsize=256)
+def get_falloff_table(gradient: float, intensity: float, darkness_intensity: int) -> ndarray:
+    """
+    Returns the brightness (alpha subtracted from the darkness) of a bright spot at each step of normalised distance
+    to its center: (1 - (squared distance / squared radius) ** gradient) * darkness_intensity * intensity
+    :param gradient: exponent of the falloff (see get_flicker_gradient())
+    :param intensity: intensity of the bright spot (0 to 1)
+    :param darkness_intensity: alpha intensity of the darkness (0 to 255)
+    :return: int16 array of FALLOFF_BINS values, indexed by LightKernel.indices
+    """
+    squared_distances = linspace(0, 1, FALLOFF_BINS) ** 2
+    return ((1 - squared_distances ** gradient) * darkness_intensity * intensity).astype(int16)
+
+
+def get_flicker_gradient(gradient: tuple[float, float]) -> float:
+    """
+    Draws the exponent of the falloff of a bright spot for one frame. It is quantised to FLICKER_LEVELS levels
+    between the min and max of the gradient, so falloff tables are reused across frames
+    :param gradient: (min, max) of the exponent. If both are equal, the bright spot does not flicker
+    :return: exponent of the falloff
+    """
+    if gradient[0] == gradient[1]:
+        return gradient[0]
+
+    return gradient[0] + (gradient[1] - gradient[0]) * randint(0, FLICKER_LEVELS - 1) / (FLICKER_LEVELS - 1)
+
+
+def composite_bright_spot(alpha_layer: ndarray, kernel: LightKernel, table: ndarray, max_alpha: int) -> None:
+    """
+    Subtracts the brightness of a bright spot from the alpha of the darkness, only within its bounding box.
+    Pure Python version, see cythonized_lights.pyx for the compiled one
+    :param alpha_layer: alpha of the darkness, of shape (height, width). Modified in place
+    :param kernel: LightKernel of the bright spot
+    :param table: falloff table of the bright spot (see get_falloff_table())
+    :param max_alpha: alpha intensity of the darkness (0 to 255)
+    :return: None
+    """
+    alpha = alpha_layer[kernel.rows, kernel.cols]  # view of the bounding box
+    temp_data = alpha[kernel.mask].astype(int16) - table[kernel.indices]
+    alpha[kernel.mask] = clip(temp_data, 0, max_alpha).astype(uint8)
@@ -55,6 +55,8 @@ class MineMadnessApp(App):
 
     music_on = BooleanProperty(None)
     flickering_torches_on = BooleanProperty(None)
+    darkness_resolution = NumericProperty(0)  # scale of the darkness mask (1 is full resolution), 0 is automatic
+    search_engine = StringProperty("bfs")  # engine of PathFinder.shortest_path(): "bfs", "a_star" or "bidirectional"
     game_mode_normal = BooleanProperty(None)
     ongoing_game = BooleanProperty(False)
     saved_game = BooleanProperty(False)
@@ -76,7 +78,17 @@ class MineMadnessApp(App):
         self.game: MineMadnessGame | None = None
         self.sm: ScreenManager | None = None
 
+    def build_config(self, config) -> None:
+        """
+        Sets the default values of the settings, which are persisted in the config file of the app (minemadness.ini)
+        :param config: ConfigParser of the app
+        :return: None
+        """
+        config.setdefaults("options", {"darkness_resolution": 0, "search_engine": "bfs"})
+
     def build(self) -> ScreenManager:
+        self.darkness_resolution = self.config.getfloat("options", "darkness_resolution")
+        self.search_engine = self.config.get("options", "search_engine")
         Builder.load_file(get_resource_path("./how_to_play.kv"))
         Builder.load_file(get_resource_path("./progression_menu.kv"))
         self.sm = ScreenManager(transition=FadeTransition(duration=0.3))
@@ -246,7 +258,8 @@ class MineMadnessApp(App):
         self.ongoing_game = True
         self._setup_dungeon_screen(DungeonLayout(game=self.game,
                                                  blueprint = Blueprint(layout=data["blueprint"]["layout"]),
-                                                 torches_dict = data["torches_dict"]))
+                                                 torches_dict = data["torches_dict"],
+                                                 search_engine = self.search_engine))
 
 
     def _convert_all_digit_keys_to_int(self, dictionary: dict) -> dict:
@@ -270,6 +283,12 @@ class MineMadnessApp(App):
         else:
             app.music.stop()
 
+    @staticmethod
+    def on_darkness_resolution(app, darkness_resolution):
+        if app.config is not None:
+            app.config.set("options", "darkness_resolution", darkness_resolution)
+            app.config.write()
+
     def trigger_game_over(self, message: str) -> None:
         """
         Triggers game over screen
@@ -168,7 +168,7 @@ class MineMadnessGame(Screen):  # initialized in kv file
         """
         scrollview = self.children[0].children[1]
         if dungeon is None:
-            dungeon = DungeonLayout(game=self)
+            dungeon = DungeonLayout(game=self, search_engine=App.get_running_app().search_engine)
         self.dungeon = dungeon
         scrollview.add_widget(dungeon)
 
@@ -214,6 +214,9 @@ class MineMadnessGame(Screen):  # initialized in kv file
                     game.active_character = next(player for player in Player.data if player.state == "in_game")
                 else:
                     Monster.reset_moves()
+                    # one shared FlowField toward the players for each group of monsters with same blocked_by
+                    game.dungeon.prepare_chase_fields([monster for monster in Monster.data
+                                                       if monster.state == "in_game" and monster.chases == "player"])
                     game.active_character = next(monster for monster in Monster.data if monster.state == "in_game")
 
     @staticmethod
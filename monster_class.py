@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from random import randint, choice
+from typing import Iterator
 from abc import ABC, abstractmethod
-from statistics import mean, pvariance
 
 from character_class import Character
 
@@ -190,15 +190,14 @@ class Monster(Character, ABC):
         :return: random free position in range (if any), otherwise None
         """
         free_positions: set[tuple[int,int]] = self.get_dungeon().scan_tiles(self.cannot_share_tile_with, exclude=True)
+        distance_field: DistanceField = self.get_dungeon().distance_field(self.get_position(), self.blocked_by)
 
         reach_free_positions = {position for position in self.get_dungeon().get_range(self.get_position(), max_steps)
-                         if self.get_dungeon().check_if_connexion(self.get_position(), position, self.blocked_by, max_steps)
-                                and position in free_positions}
+                                if distance_field.reaches(position, max_steps) and position in free_positions}
 
         if min_steps is not None:
             reach_free_positions = {position for position in reach_free_positions
-                                    if not self.get_dungeon().check_if_connexion
-                                    (self.get_position(), position, self.blocked_by, min_steps - 1)}  # min is included
+                                    if not distance_field.reaches(position, min_steps - 1)}  # min is included
 
         return choice(list(reach_free_positions)) if len(reach_free_positions) > 0 else None
 
@@ -214,40 +213,30 @@ class Monster(Character, ABC):
         :return: free position in range (if any), otherwise None
         """
         free_positions: set[tuple[int,int]] = self.get_dungeon().scan_tiles(self.cannot_share_tile_with, exclude=True)
+        distance_field: DistanceField = self.get_dungeon().distance_field(self.get_position(), self.blocked_by)
 
         reach_free_positions = {position for position in self.get_dungeon().get_range(self.get_position(), steps)
-                         if self.get_dungeon().check_if_connexion(self.get_position(), position, self.blocked_by, steps)
-                                and position in free_positions}
+                                if distance_field.reaches(position, steps) and position in free_positions}
 
         if len(reach_free_positions) == 0:
             return None  # exit here so no need of useless expensive computation
 
         # all positions to avoid are considered, not only the ones in range
+        exclude_distance_field: DistanceField = self.get_dungeon().distance_field(self.get_position(),
+                                                                                  exclude_blocked_by)
         positions_to_avoid = {position for position in self.get_dungeon().scan_tiles([exclude], exclude=False)
-                              if len(self.get_dungeon().find_shortest_path
-                              (self.get_position(), position, exclude_blocked_by)) > 1}
+                              if exclude_distance_field.get_path_length(position) > 1}
 
         if len(positions_to_avoid) == 0:
             return None
             #raise Exception("There is nothing to flee from!")
 
-        position_stats: dict[tuple[int,int]: list] = {rf_position : [len(self.get_dungeon().find_shortest_path
-                                                                        (rf_position, av_position, exclude_blocked_by))
-                                                                    for av_position in positions_to_avoid]
-                                                      for rf_position in reach_free_positions}
-
-        position_stats = {rf_position: ([mean(position_stats[rf_position]), pvariance(position_stats[rf_position])]
-                                         if len(position_stats[rf_position]) > 1
-                                         else [position_stats[rf_position][0], 0])
-                          for rf_position in position_stats.keys()}
-
         # suitable positions have the max mean and the min variance (equally far from all excluded Token.kinds)
-        max_mean = max(value[0] for value in position_stats.values())
-        position_stats = {rf_position: value for rf_position, value in position_stats.items() if value[0] == max_mean}
-        min_var = min(value[1] for value in position_stats.values())
-        position_stats = {rf_position: value for rf_position, value in position_stats.items() if value[1] == min_var}
+        isolated_positions: list[tuple[int,int]] = (self.get_dungeon().get_flee_map(positions_to_avoid,
+                                                                                     exclude_blocked_by)
+                                                    .get_isolated_positions(list(reach_free_positions)))
 
-        return choice(list(position_stats.keys()))  # None is returned above
+        return choice(isolated_positions)  # None is returned above
 
 
     def get_path_to_target(self, target: tuple[int,int] | None) -> list[tuple[int,int]]:
@@ -298,10 +287,7 @@ class Monster(Character, ABC):
         :param targets: set of candidate target positions to evaluate
         :return: coordinates of the position of the target. None if there is no accessible target
         """
-        paths = [self.get_dungeon().find_shortest_path(self.get_position(), target, self.blocked_by)
-                 for target in targets]
-        sorted_paths = sorted([path for path in paths if len(path) > 1], key=len)
-        return sorted_paths[0][-1] if len(sorted_paths) > 0 else None
+        return self.get_dungeon().distance_field(self.get_position(), self.blocked_by).get_nearest(targets)
 
 
     def _find_closest_accesses(self, target: tuple[int,int]) -> set[tuple[int,int]] | None:
@@ -311,26 +297,23 @@ class Monster(Character, ABC):
         :param target: coordinates of the target
         :return: list with the coordinates of the closest accesses, None if there is no access
         """
-        paths_to_access_candidates: list[list[tuple]] = [self.get_dungeon().find_shortest_path
-                                                        (target, position, self.blocked_by)
-                                                        for position in self.get_dungeon().scan_tiles
-                                                        (self.cannot_share_tile_with, exclude=True)]
+        # one search from the target and one from self.token.position serve all access candidates
+        target_field: DistanceField = self.get_dungeon().distance_field(target, self.blocked_by)
+        own_field: DistanceField = self.get_dungeon().distance_field(self.get_position(), self.blocked_by)
+        max_length: int = own_field.get_path_length(target)
 
         # only considered access candidates with valid paths to target
         # of equal or shorter length than from self.token.position to target
-        paths_to_access_candidates = [path for path in paths_to_access_candidates
-                                      if 1 < len(path) <= len(self.get_dungeon().find_shortest_path
-                                      (self.get_position(), target, self.blocked_by))]
-
-        #exclude inaccessible access candidates from current position
-        paths_to_access_candidates = [path for path in paths_to_access_candidates
-                                      if len(self.get_dungeon().find_shortest_path
-                                      (self.get_position(), path[-1], self.blocked_by)) > 1]
+        # and accessible from current position
+        access_lengths: dict[tuple[int,int], int] = {
+            position: length for position in self.get_dungeon().scan_tiles(self.cannot_share_tile_with, exclude=True)
+            if 1 < (length := target_field.get_path_length(position)) <= max_length
+            and own_field.get_path_length(position) > 1}
 
         accesses = set()
-        if len(paths_to_access_candidates) > 0:
-            shortest_length = min(len(path) for path in paths_to_access_candidates)
-            accesses = {path[-1] for path in paths_to_access_candidates if len(path) == shortest_length}
+        if len(access_lengths) > 0:
+            shortest_length = min(access_lengths.values())
+            accesses = {position for position, length in access_lengths.items() if length == shortest_length}
 
         return accesses if len(accesses) > 0 else None
 
@@ -344,30 +327,69 @@ class Monster(Character, ABC):
         closer to the target is returned (only steps reducing distance allowed). Otherwise, the entire path is returned
         :return: path to target (if any), otherwise [Character.position]
         """
-        paths_to_accesses: list = []
+        closest_access: tuple[int,int] | None = None
         if accesses is not None:
-            paths_to_accesses: list[list[tuple]] =[self.get_dungeon().find_shortest_path
-                                                   (self.get_position(), access, self.blocked_by)
-                                                   for access in accesses]
-            paths_to_accesses = [path for path in paths_to_accesses if len(path) > 1]
+            distance_field: DistanceField = self.get_dungeon().distance_field(self.get_position(), self.blocked_by)
+            closest_access = distance_field.get_nearest(accesses)
 
-        if len(paths_to_accesses) == 0:
+        if closest_access is None:
             return [self.get_position()]
 
-        path = sorted(paths_to_accesses, key=len)[0]
-        if direct_to_target is not None:
-            max_distance = self.get_dungeon().get_distance(self.get_position(), direct_to_target)
-            for idx, position in enumerate(path[1:]):
+        # path is only built up to the positions the Monster can walk this turn (first position is self.position)
+        return self._build_path(distance_field.iter_path(closest_access, max_length=self.remaining_moves + 1),
+                                direct_to_target)
+
+    def _get_chase_path(self, chase_field: FlowField, target: tuple[int,int], smart: bool) -> list[tuple]:
+        """
+        Returns the path towards the target. The FlowField is followed unless the access it leads to (the position
+        next to the target) is taken by a Token the Monster cannot share the Tile with. The FlowField is shared and
+        ignores those Tokens, so in that case the path goes to the closest free access instead
+        :param chase_field: FlowField shared by the Monsters chasing the same Token.kind
+        :param target: position of the target
+        :param smart: see Monster.chase()
+        :return: path towards the target, [Character.position] if it cannot move
+        """
+        direct_to_target: tuple[int,int] | None = None if smart else target
+        access: tuple[int,int] | None = chase_field.get_access(self.get_position())
+
+        if access is not None and any(self.get_dungeon().get_tile(access).has_token(token_kind)
+                                      for token_kind in self.cannot_share_tile_with):
+            return self._select_path_to_target(self._find_closest_accesses(target), direct_to_target)
+
+        return self._follow_chase_field(chase_field, direct_to_target)
+
+    def _follow_chase_field(self, chase_field: FlowField, direct_to_target: tuple[int,int] | None = None) -> list[tuple]:
+        """
+        Follows the FlowField downhill towards the nearest chased Token, stopping next to it
+        :param chase_field: FlowField shared by the Monsters chasing the same Token.kind
+        :param direct_to_target: position of the target (optional). See Monster._select_path_to_target()
+        :return: path towards the target, [Character.position] if it cannot move
+        """
+        # the chased position itself is never part of the path, Monster stops next to it
+        max_length: int = min(self.remaining_moves + 1, chase_field.get_distance(self.get_position()))
+        return self._build_path(chase_field.iter_descent(self.get_position(), max_length=max_length),
+                                direct_to_target)
+
+    def _build_path(self, positions: Iterator[tuple[int,int]], direct_to_target: tuple[int,int] | None) -> list[tuple]:
+        """
+        Builds the path from the positions yielded by a search, starting at Character.position
+        :param positions: positions of the path
+        :param direct_to_target: position of the target (optional). If passed, only steps reducing the distance to the
+        target are kept
+        :return: path without landing conflicts
+        """
+        path: list[tuple] = []
+        max_distance = self.get_dungeon().get_distance(self.get_position(), direct_to_target) \
+            if direct_to_target is not None else None
+        for position in positions:
+            if direct_to_target is not None and len(path) > 0:
                 current_distance = self.get_dungeon().get_distance(position, direct_to_target)
                 if current_distance > max_distance:
-                    path = path[:idx + 1]
                     break
                 max_distance = current_distance
+            path.append(position)
 
-        path = path[:self.remaining_moves + 1]  # first position is self.position
-        path = self._remove_landing_conflicts(path)
-
-        return path
+        return self._remove_landing_conflicts(path)
 
     def _remove_landing_conflicts(self, path: list[tuple]) -> list[tuple]:
         """
@@ -400,18 +422,15 @@ class Monster(Character, ABC):
         so it gets blocked by walls if cannot move forward
         :return: None
         """
-        target: tuple[int, int] | None = self._find_target_by_path(self._find_possible_targets(free=False))
+        # FlowField is shared by all Monsters chasing the same Token.kind with the same blocked_by
+        chase_field: FlowField = self.get_dungeon().get_chase_field(self.chases, self.blocked_by)
+        target: tuple[int, int] | None = chase_field.get_source(self.get_position())
 
         if target is not None:
             if self.get_dungeon().are_nearby(self.get_position(), target):
                 self.move_token_or_act_on_tile([self.get_position()])
             else:
-                accesses = self._find_closest_accesses(target)
-                if smart:
-                    self.move_token_or_act_on_tile(self._select_path_to_target(accesses))
-                else:
-                    self.move_token_or_act_on_tile(self._select_path_to_target(accesses, direct_to_target=target))
+                self.move_token_or_act_on_tile(self._get_chase_path(chase_field, target, smart))
         else:
             self.move_token_or_act_on_tile(self.get_path_to_target(
                 self.find_random_target(int(self.remaining_moves * self.stats.random_motility))))
-
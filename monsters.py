@@ -406,13 +406,9 @@ class Penumbra(Monster):
         :param position: position from which the steps should be counted (optional)
         :return: None
         """
-        player_positions = {tile.position for tile in self.get_dungeon().children if tile.has_token("player")}
         position = self.get_position() if position is None else position
 
-        if any(self.get_dungeon().check_if_connexion(position, player_position,
-                                       self.blocked_by,
-                                       steps)
-               for player_position in player_positions):
+        if self.get_dungeon().find_token_within(position, "player", self.blocked_by, steps) is not None:
             self.hide()
 
     def hide(self) -> None:
@@ -422,18 +418,14 @@ class Penumbra(Monster):
         """
         self.token.color.a = 0  # changes transparency
         self.ability_active = True
+        self.get_dungeon().pf.invalidate()  # hidden characters do not block paths
 
     def unhide_if_all_players_unreachable(self) -> None:
         """
         Unhides the Monster if all players are unreachable (no possible path to them)
         :return: None
         """
-        player_positions = {tile.position for tile in self.get_dungeon().children if tile.has_token("player")}
-
-        if all(len(self.get_dungeon().find_shortest_path(self.get_position(),
-                                                         player_position,
-                                                         self.blocked_by)) == 1
-               for player_position in player_positions):
+        if self.get_dungeon().find_token_within(self.get_position(), "player", self.blocked_by) is None:
             self.unhide()
 
     def unhide(self) -> None:
@@ -443,6 +435,7 @@ class Penumbra(Monster):
         """
         self.token.color.a = 1  # changes transparency
         self.ability_active = False
+        self.get_dungeon().pf.invalidate()  # hidden characters do not block paths
 
     def move(self):
         """
@@ -481,15 +474,12 @@ class ClawJaw(Monster):
         self.char: str = "C"
         self.name: str = "Claw Jaw"
         self.species: str = "clawjaw"
-        # values of self.blocked_by vary in _set_possible_targets() and self.move() and self._move_across walls
-        # values self.cannot_share_tile_with vary in _set_possible_targets() and self.move() self._move_across walls
         self.step_transition: str = "linear"  # gliding
         self.step_duration: float = 0.4
         self.stats = stats.ClawJawStats()
 
         # exclusive of ClawJaw
         self.dig_position: tuple[int,int] | None = None  # position of the wall to dig
-        self.dig_factor: float = 0.75  # the higher, the higher the chance of taking digging path if free available
 
         if attributes_dict is not None:
             self.overwrite_attributes(attributes_dict)
@@ -518,6 +508,13 @@ class ClawJaw(Monster):
             case _:
                 raise ValueError(f"Invalid token_species {token_species}")
 
+    def get_dig_costs(self) -> dict[str, int]:
+        """
+        Returns the steps spent digging each Token.species of wall, as in ClawJaw.dig(). Digging quartz takes the
+        rest of the turn, so it is valued as a whole turn
+        :return: dictionary with Token.species of the walls as keys and steps as values
+        """
+        return {"rock": 1, "granite": 3, "quartz": self.stats.moves}
 
     def act_on_tile(self, tile: Tile) -> None:
         """
@@ -568,52 +565,38 @@ class ClawJaw(Monster):
                 wall_tile.get_token("light").delete_token(wall_tile)
             self.get_dungeon().dm.update_bright_spots()
 
-    def _move_across_walls(self, target: tuple[int,int]) -> None:
+    def _move_across_walls(self, dig_field: DistanceField, target: tuple[int,int]) -> None:
         """
-        This method allows the Claw Jaw to chase a target going across walls and stopping
-        when encountering one
+        This method allows the Claw Jaw to chase a target following the path with the lowest dig cost and stopping
+        when encountering a wall, which is dug if there are steps enough left
+        :param dig_field: DistanceField of the ClawJaw weighted by dig costs
         :param target: target position to reach
         :return: None
         """
-        self.blocked_by, self.cannot_share_tile_with = ["player"], ["monster", "player"]
-        path, wall_position = self.stop_upon_wall(self._select_path_to_target
-                                                  (self._find_closest_accesses(target)))
-
-        self.dig_position: tuple[int, int] | None = wall_position
-        super().move_token_or_act_on_tile(path)
-
-    def _set_possible_targets(self) -> tuple:
-        """
-        This method finds two possible targets at once, one by distance and the other by path
-        :return: coordinates of the target by distance, coordinates of the target by path
-        """
-        self.cannot_share_tile_with: list[str] = ["monster", "player"]
-        target_dist: tuple[int, int] | None = self._find_target_by_distance(self._find_possible_targets(free=False))
+        path, wall_position = self.stop_upon_wall(dig_field.get_path(target)[:-1])  # target position excluded
 
-        self.blocked_by, self.cannot_share_tile_with = ["wall", "player"], ["wall", "monster", "player"]
-        target_path: tuple[int, int] | None = self._find_target_by_path(self._find_possible_targets(free=False))
+        if len(path) > self.remaining_moves + 1:  # wall is not reached this turn
+            path, wall_position = path[:self.remaining_moves + 1], None
 
-        return target_dist, target_path
+        path_length: int = len(path)
+        path = self._remove_landing_conflicts(path)
+        self.dig_position: tuple[int, int] | None = wall_position if len(path) == path_length else None
+        super().move_token_or_act_on_tile(path)
 
     def move(self) -> None:
         """
-        Special method for moving across walls
+        Special method for moving across walls: chases the player with the lowest dig cost, digging the walls on the
+        way only if it is cheaper than going around them
         :return: None
         """
-        target_dist, target_path = self._set_possible_targets()
+        self.restore_cannot_share_blocked_by()
+        dig_field: DistanceField = self.get_dungeon().get_dig_field(self.get_position(), self.get_dig_costs(),
+                                                                    ["player"])
+        target: tuple[int, int] | None = dig_field.get_nearest(self._find_possible_targets(free=False))
 
-        if target_path is None and target_dist is None:
+        if target is None:
             self.get_dungeon().game.activate_next_character()
-        elif self.get_dungeon().are_nearby(self.get_position(), target_dist):
+        elif self.get_dungeon().are_nearby(self.get_position(), target):
             super().move_token_or_act_on_tile([self.get_position()])
-        elif target_path is None:
-            self._move_across_walls(target_dist)
         else:
-            self.blocked_by, self.cannot_share_tile_with = ["wall", "player"], ["wall", "monster", "player"]
-            path: list[tuple] = self._select_path_to_target(self._find_closest_accesses(target_path))
-
-            # if path too long, will go across walls
-            if len(path) * self.dig_factor > self.get_dungeon().get_distance(self.get_position(), target_dist):
-                self._move_across_walls(target_dist)
-            else:
-                super().move_token_or_act_on_tile(path)
+            self._move_across_walls(dig_field, target)
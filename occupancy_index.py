@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from numpy import zeros, uint8, nonzero, ndarray
+
+
+class OccupancyIndex:
+    """
+    Keeps one plane per Token.kind storing how many Tokens of that kind are on each position of the DungeonLayout.
+    It is updated by Tile.set_token() and Tile.remove_token(), so queries never need to walk the Tiles
+    """
+
+    def __init__(self, rows: int, cols: int):
+        self.rows: int = rows
+        self.cols: int = cols
+        self.planes: dict[str, ndarray] = {}  # planes are created when the first Token of a kind is set
+
+    def _get_plane(self, token_kind: str) -> ndarray:
+        """
+        Returns the plane of the specified Token.kind, creating it if it does not exist yet
+        :param token_kind: Token.kind of the plane
+        :return: plane of the Token.kind
+        """
+        if token_kind not in self.planes:
+            self.planes[token_kind] = zeros((self.rows, self.cols), dtype=uint8)
+        return self.planes[token_kind]
+
+    def add_token(self, token_kind: str, position: tuple[int, int]) -> None:
+        """
+        Registers a Token of the specified kind at the specified position
+        :param token_kind: Token.kind of the Token
+        :param position: coordinates of the Tile where the Token is set
+        :return: None
+        """
+        self._get_plane(token_kind)[position] += 1
+
+    def remove_token(self, token_kind: str, position: tuple[int, int]) -> None:
+        """
+        Unregisters a Token of the specified kind from the specified position
+        :param token_kind: Token.kind of the Token
+        :param position: coordinates of the Tile where the Token is removed from
+        :return: None
+        """
+        self._get_plane(token_kind)[position] -= 1
+
+    def get_mask(self, token_kinds: list[str]) -> ndarray:
+        """
+        Returns a boolean plane which is True on the positions having at least one Token of ONE of the token_kinds
+        :param token_kinds: Token.kinds to consider
+        :return: boolean array of shape (rows, cols)
+        """
+        mask = zeros((self.rows, self.cols), dtype=bool)
+        for token_kind in token_kinds:
+            if token_kind in self.planes:
+                mask |= self.planes[token_kind] > 0
+        return mask
+
+    def get_positions(self, token_kinds: list[str], exclude: bool = False) -> set[tuple[int, int]]:
+        """
+        Returns a set with coordinates of positions having none (exclude set to True) or at least one (exclude set to
+        False) of Tokens of the specified token_kinds
+        :param token_kinds: Token.kinds to consider
+        :param exclude: determines if search is exclusive or inclusive (see DungeonLayout.scan_tiles())
+        :return: set with the coordinates of the positions
+        """
+        mask = self.get_mask(token_kinds)
+        if exclude:
+            mask = ~mask
+        rows, cols = nonzero(mask)
+        return set(zip(rows.tolist(), cols.tolist()))
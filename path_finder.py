@@ -0,0 +1,656 @@
+from __future__ import annotations
+
+from collections import deque, OrderedDict
+from heapq import heappush, heappop
+from itertools import count
+from functools import lru_cache
+from typing import Any, Callable, Iterator
+from numpy import int64, ndarray, array
+
+
+@lru_cache(maxsize=None)
+def get_neighbour_table(rows: int, cols: int) -> tuple[tuple[int, ...], ...]:
+    """
+    Returns, for each tile id (row * cols + col), the ids of its nearby tiles within the limits of the dungeon.
+    They are listed in the order explored by the searches: up, down, left, right. Cached per dungeon size
+    :param rows: number of rows of the dungeon
+    :param cols: number of columns of the dungeon
+    :return: tuple indexed by tile id with the tuple of ids of its nearby tiles
+    """
+    directions: tuple = (-1, 0), (1, 0), (0, -1), (0, 1)
+    return tuple(tuple((row + dy) * cols + col + dx for dy, dx in directions
+                       if 0 <= row + dy < rows and 0 <= col + dx < cols)
+                 for row in range(rows) for col in range(cols))
+
+
+@lru_cache(maxsize=None)
+def get_position_table(rows: int, cols: int) -> tuple[tuple[int, int], ...]:
+    """
+    Returns the coordinates of each tile id (row * cols + col). Cached per dungeon size
+    :param rows: number of rows of the dungeon
+    :param cols: number of columns of the dungeon
+    :return: tuple indexed by tile id with the coordinates of the tile
+    """
+    return tuple((row, col) for row in range(rows) for col in range(cols))
+
+
+class DistanceField:
+    """
+    Result of a single breadth-first search from an origin position. Holds the distance (in number of steps) and the
+    predecessor of every position reached, so paths, reachability and nearest targets can be read without searching
+    again. Blocked positions next to reached ones are also recorded (they can be targeted but not crossed).
+    Distances and predecessors are lists indexed by tile id (row * cols + col), -1 if not reached
+    """
+
+    def __init__(self, origin: tuple[int, int], distances: list[int], predecessors: list[int], cols: int,
+                 max_steps: int | None = None):
+
+        self.origin: tuple[int, int] = origin
+        self.distances: list[int] = distances
+        self.predecessors: list[int] = predecessors
+        self.cols: int = cols
+        self.positions: tuple[tuple[int, int], ...] = get_position_table(len(distances) // cols, cols)
+        self.max_steps: int | None = max_steps  # if not None, positions further away were not explored
+
+    def get_distance(self, position: tuple[int, int]) -> int | None:
+        """
+        Returns the number of steps from DistanceField.origin to the position
+        :param position: coordinates of the position
+        :return: number of steps if position is reachable, None otherwise
+        """
+        distance: int = self.distances[position[0] * self.cols + position[1]]
+        return None if distance < 0 else distance
+
+    def get_path(self, position: tuple[int, int]) -> list[tuple[int, int]]:
+        """
+        Returns the shortest path from DistanceField.origin to the position. Same format as
+        DungeonLayout.find_shortest_path(): origin and position included, [origin] if no possible path
+        :param position: coordinates of the end position
+        :return: path to position if possible, otherwise list with one element [DistanceField.origin]
+        """
+        if self.distances[position[0] * self.cols + position[1]] < 0:
+            return [self.origin]
+
+        return list(self.iter_path(position))
+
+    def iter_path(self, position: tuple[int, int], max_length: int | None = None) -> Iterator[tuple[int, int]]:
+        """
+        Yields the positions of the shortest path from DistanceField.origin to the position, starting from origin.
+        If max_length is specified, only the first max_length positions are stored and yielded, so truncated paths
+        are never built in full
+        :param position: coordinates of the end position (must be reachable)
+        :param max_length: maximum number of positions to yield (optional)
+        :return: iterator over the positions of the path
+        """
+        if max_length is not None and max_length <= 0:
+            return
+
+        tile_id: int = position[0] * self.cols + position[1]
+        distance: int = self.distances[tile_id]
+
+        # skip the positions beyond max_length without storing them
+        while max_length is not None and distance >= max_length:
+            tile_id = self.predecessors[tile_id]
+            distance -= 1
+
+        prefix: list[int] = [tile_id]
+        while self.predecessors[prefix[-1]] >= 0:
+            prefix.append(self.predecessors[prefix[-1]])
+
+        yield from (self.positions[tile_id] for tile_id in reversed(prefix))
+
+    def get_path_length(self, position: tuple[int, int]) -> int:
+        """
+        Returns the length of the path that DistanceField.get_path() would return, without building it
+        :param position: coordinates of the end position
+        :return: number of positions of the path (1 if no possible path)
+        """
+        distance: int = self.distances[position[0] * self.cols + position[1]]
+        return 1 if distance < 0 else distance + 1
+
+    def reaches(self, position: tuple[int, int], num_of_steps: int | None = None) -> bool:
+        """
+        Checks if the position can be reached from DistanceField.origin in the given number of steps.
+        Equivalent to DungeonLayout.check_if_connexion()
+        :param position: coordinates of the position
+        :param num_of_steps: maximum number of steps. If None, DistanceField.max_steps is used
+        :return: True if there is a connexion, False otherwise
+        """
+        num_of_steps = self.max_steps if num_of_steps is None else num_of_steps
+        distance: int = self.distances[position[0] * self.cols + position[1]]
+        return 0 < distance and (num_of_steps is None or distance <= num_of_steps)
+
+    def get_nearest(self, positions: set[tuple[int, int]]) -> tuple[int, int] | None:
+        """
+        Returns the reachable position closest to DistanceField.origin (DistanceField.origin itself is not considered)
+        :param positions: set of candidate positions
+        :return: coordinates of the nearest position, None if none is reachable
+        """
+        distances, cols = self.distances, self.cols
+        reachable = [(distance, position) for position in positions
+                     if (distance := distances[position[0] * cols + position[1]]) > 0]
+        return min(reachable, key=lambda item: item[0])[1] if len(reachable) > 0 else None
+
+
+class FleeMap:
+    """
+    Path lengths from every position of the DungeonLayout to each one of the positions to flee from, stored in one
+    array of shape (number of sources, rows, cols). Lengths follow DungeonLayout.find_shortest_path() convention:
+    number of positions of the path, 1 if there is no possible path
+    """
+
+    def __init__(self, sources: tuple[tuple[int, int], ...], path_lengths: ndarray):
+        self.sources: tuple[tuple[int, int], ...] = sources
+        self.path_lengths: ndarray = path_lengths
+
+    def get_isolated_positions(self, candidates: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Returns the candidates with the max mean path length to the sources and, among them, the ones with the
+        min variance (equally far from all sources). Computed with integers (sum of lengths and n * sum of squares
+        - sum ** 2, proportional to mean and variance) so ties are exact
+        :param candidates: list of candidate positions
+        :return: list with the most isolated candidates, in the same order as passed
+        """
+        if len(candidates) == 0:
+            return []
+
+        rows, cols = zip(*candidates)
+        lengths: ndarray = self.path_lengths[:, array(rows), array(cols)]  # shape (sources, candidates)
+
+        sums: ndarray = lengths.sum(axis=0)
+        spreads: ndarray = len(self.sources) * (lengths ** 2).sum(axis=0) - sums ** 2
+        suitable: ndarray = sums == sums.max()
+        suitable &= spreads == spreads[suitable].min()
+
+        return [candidate for candidate, is_suitable in zip(candidates, suitable.tolist()) if is_suitable]
+
+
+class FlowField:
+    """
+    Result of a breadth-first search started from several sources at once. Holds the distance from every position
+    to its nearest source, and the predecessor of every position points one step downhill towards that source, so
+    Characters chasing the sources only need to follow the predecessors. Lists are indexed by tile id, -1 if not reached
+    """
+
+    def __init__(self, sources: frozenset[tuple[int, int]], distances: list[int], predecessors: list[int], cols: int):
+        self.sources: frozenset[tuple[int, int]] = sources
+        self.distances: list[int] = distances
+        self.predecessors: list[int] = predecessors
+        self.cols: int = cols
+        self.positions: tuple[tuple[int, int], ...] = get_position_table(len(distances) // cols, cols)
+
+    def get_distance(self, position: tuple[int, int]) -> int | None:
+        """
+        Returns the number of steps from the position to its nearest source
+        :param position: coordinates of the position
+        :return: number of steps if any source is reachable, None otherwise
+        """
+        distance: int = self.distances[position[0] * self.cols + position[1]]
+        return None if distance < 0 else distance
+
+    def get_source(self, position: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        Returns the source the position leads to when following the FlowField
+        :param position: coordinates of the position
+        :return: coordinates of the nearest source, None if no source is reachable or position is a source
+        """
+        tile_id: int = position[0] * self.cols + position[1]
+        if self.distances[tile_id] <= 0:
+            return None
+
+        while self.predecessors[tile_id] >= 0:
+            tile_id = self.predecessors[tile_id]
+
+        return self.positions[tile_id]
+
+    def get_access(self, position: tuple[int, int]) -> tuple[int, int] | None:
+        """
+        Returns the last position before the source when following the FlowField from the position, that is, the
+        position next to the source where a Character following the FlowField would stop
+        :param position: coordinates of the position
+        :return: coordinates of the access, None if no source is reachable or position is a source
+        """
+        tile_id: int = position[0] * self.cols + position[1]
+        if self.distances[tile_id] <= 0:
+            return None
+
+        while self.distances[tile_id] > 1:
+            tile_id = self.predecessors[tile_id]
+
+        return self.positions[tile_id]
+
+    def iter_descent(self, position: tuple[int, int], max_length: int | None = None) -> Iterator[tuple[int, int]]:
+        """
+        Yields the positions of the shortest path from the position to its nearest source, starting from position
+        (included) and ending at the source (included)
+        :param position: coordinates of the start of the path (must be reachable)
+        :param max_length: maximum number of positions to yield (optional)
+        :return: iterator over the positions of the path
+        """
+        tile_id: int = position[0] * self.cols + position[1]
+        length: int = 0
+
+        while tile_id >= 0 and (max_length is None or length < max_length):
+            yield self.positions[tile_id]
+            tile_id = self.predecessors[tile_id]
+            length += 1
+
+
+class PathFinder:
+    """
+    Manages the path searches performed on the DungeonLayout
+    """
+
+    def __init__(self, dungeon: DungeonLayout, engine: str = "bfs", cache_size: int = 64):
+        self.dungeon: DungeonLayout = dungeon
+        self.rows: int = dungeon.rows
+        self.cols: int = dungeon.cols
+        self.neighbours: tuple[tuple[int, ...], ...] = get_neighbour_table(self.rows, self.cols)
+        self.positions: tuple[tuple[int, int], ...] = get_position_table(self.rows, self.cols)
+        self.engine: str = engine  # engine of PathFinder.shortest_path(): "bfs", "a_star" or "bidirectional"
+        self.expanded_positions: int = 0  # number of positions expanded by all searches, for benchmarking
+
+        # results of the searches are cached until the board changes
+        self.generation: int = 0  # increased by PathFinder.invalidate() each time obstacles may have changed
+        self.cache_size: int = cache_size  # max number of cached results (least recently used are evicted)
+        self.cache: OrderedDict[tuple, Any] = OrderedDict()
+        self.cache_hits: int = 0
+        self.cache_misses: int = 0
+
+        # FlowFields chasing a Token.kind survive board generations: each one is kept with the sources and
+        # blocked positions it was built with, and rebuilt only when those change (see PathFinder.chase_field())
+        self.chase_fields: dict[tuple, tuple[tuple, FlowField]] = {}
+
+    def invalidate(self) -> None:
+        """
+        Starts a new board generation. Must be called whenever Tokens are set or removed or the hidden state of a
+        character changes, as any of those may open or block paths
+        :return: None
+        """
+        self.generation += 1
+        self.cache.clear()  # results of previous generations can never be hit again
+
+    def get_cached(self, query: tuple, search: Callable[[], Any]) -> Any:
+        """
+        Returns the result of the query for the current board generation, running the search only if it is not cached
+        :param query: hashable description of the query (search kind and arguments)
+        :param search: callable performing the search if the result is not cached
+        :return: result of the search
+        """
+        key: tuple = (self.generation, *query)
+
+        if key in self.cache:
+            self.cache_hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.cache_misses += 1
+        result = search()
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+        return result
+
+    def get_cache_stats(self) -> dict[str, int]:
+        """
+        Returns the counters of the cache, useful to check how much work the cache saves
+        :return: dictionary with the number of hits, misses, cached results and the current generation
+        """
+        return {"hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self.cache),
+                "generation": self.generation}
+
+    def flee_map(self, sources: tuple[tuple[int, int], ...], distance_fields: list[DistanceField]) -> FleeMap:
+        """
+        Builds the FleeMap of the sources from their DistanceFields. Path lengths are symmetric, so the field of each
+        source gives the length from every position to that source
+        :param sources: positions to flee from
+        :param distance_fields: DistanceField of each one of the sources, in the same order
+        :return: FleeMap of the sources
+        """
+        path_lengths: ndarray = array([distance_field.distances for distance_field in distance_fields],
+                                      dtype=int64).reshape((len(sources), self.rows, self.cols)) + 1
+        path_lengths[path_lengths == 0] = 1  # no possible path
+
+        return FleeMap(sources, path_lengths)
+
+    def distance_field(self, origin: tuple[int, int], blocked_positions: set[tuple[int, int]],
+                       max_steps: int | None = None) -> DistanceField:
+        """
+        Runs one breadth-first search from origin over the whole DungeonLayout or, if max_steps is specified, only
+        within max_steps of the origin. Directions are explored in the same order as
+        DungeonLayout.find_shortest_path() so both return the same paths
+        :param origin: coordinates of the origin of the search
+        :param blocked_positions: positions that cannot be crossed (they are reached but not expanded)
+        :param max_steps: maximum number of steps to explore (optional)
+        :return: DistanceField with the distances and predecessors of all reachable positions
+        """
+        return self._breadth_first_search(origin, blocked_positions, max_steps=max_steps)
+
+    def cost_field(self, origin: tuple[int, int], tile_costs: dict[tuple[int, int], int],
+                   blocked_positions: set[tuple[int, int]]) -> DistanceField:
+        """
+        Runs a Dijkstra search from origin where entering a position costs tile_costs[position] (1 if not listed).
+        Used by Characters for which some obstacles are not blocking but expensive to cross (e.g. walls to dig).
+        Distances of the returned DistanceField are costs instead of number of steps
+        :param origin: coordinates of the origin of the search
+        :param tile_costs: cost of entering each one of the positions not costing 1
+        :param blocked_positions: positions that cannot be crossed (they are reached but not expanded)
+        :return: DistanceField with the costs and predecessors of all reachable positions
+        """
+        neighbours = self.neighbours
+        blocked: bytearray = self._get_blocked_ids(blocked_positions)
+        costs: list[int] = [1] * len(neighbours)
+        for position, cost in tile_costs.items():
+            costs[self.get_tile_id(position)] = cost
+
+        origin_id: int = self.get_tile_id(origin)
+        distances: list[int] = [-1] * len(neighbours)
+        predecessors: list[int] = [-1] * len(neighbours)
+        settled: bytearray = bytearray(len(neighbours))
+        distances[origin_id] = 0
+        heap: list[tuple[int, int]] = [(0, origin_id)]
+
+        while len(heap) > 0:
+            distance, current_id = heappop(heap)
+            if settled[current_id]:
+                continue  # outdated entry of the heap
+            settled[current_id] = 1
+            if blocked[current_id] and current_id != origin_id:
+                continue
+            self.expanded_positions += 1
+
+            for neighbour in neighbours[current_id]:
+                next_distance = distance + costs[neighbour]
+                if distances[neighbour] < 0 or next_distance < distances[neighbour]:
+                    distances[neighbour] = next_distance
+                    predecessors[neighbour] = current_id
+                    heappush(heap, (next_distance, neighbour))
+
+        return DistanceField(origin, distances, predecessors, self.cols)
+
+    def flow_field(self, sources: frozenset[tuple[int, int]], blocked_positions: set[tuple[int, int]]) -> FlowField:
+        """
+        Runs one breadth-first search from all the sources at once over the whole DungeonLayout
+        :param sources: coordinates of the sources (they are expanded even if blocked)
+        :param blocked_positions: positions that cannot be crossed (they are reached but not expanded)
+        :return: FlowField of the sources
+        """
+        distances, predecessors = self._search_levels([self.get_tile_id(source) for source in sources],
+                                                      blocked_positions)
+        return FlowField(sources, distances, predecessors, self.cols)
+
+    def chase_field(self, signature: tuple, sources: frozenset[tuple[int, int]],
+                    blocked_positions: frozenset[tuple[int, int]]) -> FlowField:
+        """
+        Returns the FlowField toward the sources, shared by all the Characters with the same signature (chased
+        Token.kind and blocking Token.kinds). It is only rebuilt if the sources or the blocked positions changed
+        since it was built, so Tokens moving elsewhere on the board do not trigger a new search
+        :param signature: hashable description of the Characters sharing the FlowField
+        :param sources: coordinates of the positions to chase
+        :param blocked_positions: positions that cannot be crossed
+        :return: FlowField toward the sources
+        """
+        state: tuple = (sources, blocked_positions)
+        stored: tuple[tuple, FlowField] | None = self.chase_fields.get(signature)
+
+        if stored is None or stored[0] != state:
+            self.cache_misses += 1
+            stored = state, self.flow_field(sources, blocked_positions)
+            self.chase_fields[signature] = stored
+        else:
+            self.cache_hits += 1
+
+        return stored[1]
+
+    def find_within(self, origin: tuple[int, int], targets: set[tuple[int, int]],
+                    blocked_positions: set[tuple[int, int]], max_steps: int | None = None) -> tuple[int, int] | None:
+        """
+        Runs one breadth-first search from origin, bounded to max_steps, that stops as soon as any of the targets is
+        reached. Targets are reachable even if blocked
+        :param origin: coordinates of the origin of the search
+        :param targets: coordinates of the positions to look for (origin itself is not considered)
+        :param blocked_positions: positions that cannot be crossed
+        :param max_steps: maximum number of steps to explore (optional)
+        :return: coordinates of the first target reached, None if none is reached
+        """
+        origin_id: int = self.get_tile_id(origin)
+        target_ids: set[int] = {self.get_tile_id(target) for target in targets} - {origin_id}
+        if len(target_ids) == 0:
+            return None
+
+        distances, _ = self._search_levels([origin_id], blocked_positions, max_steps, target_ids)
+        return next((self.positions[target_id] for target_id in target_ids if distances[target_id] > 0), None)
+
+    def shortest_path(self, start_position: tuple[int, int], end_position: tuple[int, int],
+                      blocked_positions: set[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Returns the shortest path from start_position to end_position using PathFinder.engine. All engines return
+        paths of the same length, but different engines may choose different paths among equally short ones.
+        The search stops as soon as end_position is found and the path is rebuilt once from the predecessors
+        :param start_position: coordinates of the start of the path
+        :param end_position: coordinates of the end of the path (reachable even if blocked)
+        :param blocked_positions: positions that cannot be crossed
+        :return: path to end_position if possible, otherwise list with one element [start_position]
+        """
+        match self.engine:
+            case "bfs":
+                return (self._breadth_first_search(start_position, blocked_positions, target=end_position)
+                        .get_path(end_position))
+            case "a_star":
+                return self._a_star_search(start_position, end_position, blocked_positions)
+            case "bidirectional":
+                return self._bidirectional_search(start_position, end_position, blocked_positions)
+            case _:
+                raise ValueError(f"Invalid engine {self.engine}. Valid are: bfs, a_star, bidirectional.")
+
+    def get_tile_id(self, position: tuple[int, int]) -> int:
+        """
+        Returns the tile id of a position: index of the position in the tables of the PathFinder
+        :param position: coordinates of the position
+        :return: tile id (row * cols + col)
+        """
+        return position[0] * self.cols + position[1]
+
+    def get_nearby_positions(self, position: tuple[int, int]) -> set[tuple[int, int]]:
+        """
+        Returns the nearby positions of the specified position, read from PathFinder.neighbours
+        :param position: coordinates of the position
+        :return: set of nearby positions
+        """
+        return {self.positions[neighbour] for neighbour in self.neighbours[self.get_tile_id(position)]}
+
+    def _get_blocked_ids(self, blocked_positions: set[tuple[int, int]]) -> bytearray:
+        """
+        Converts the blocked positions into a flag per tile id, so searches do not hash coordinates
+        :param blocked_positions: positions that cannot be crossed
+        :return: bytearray indexed by tile id, 1 if blocked
+        """
+        blocked: bytearray = bytearray(len(self.neighbours))
+        for position in blocked_positions:
+            blocked[position[0] * self.cols + position[1]] = 1
+        return blocked
+
+    def _a_star_search(self, start_position: tuple[int, int], end_position: tuple[int, int],
+                       blocked_positions: set[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        A* search using the distance in number of steps (as DungeonLayout.get_distance()) as heuristic. Ties in the
+        estimated length are broken in favour of the positions closer to end_position, then by order of discovery
+        :param start_position: coordinates of the start of the path
+        :param end_position: coordinates of the end of the path (reachable even if blocked)
+        :param blocked_positions: positions that cannot be crossed
+        :return: path to end_position if possible, otherwise list with one element [start_position]
+        """
+        neighbours, positions = self.neighbours, self.positions
+        blocked: bytearray = self._get_blocked_ids(blocked_positions)
+        start_id, end_id = self.get_tile_id(start_position), self.get_tile_id(end_position)
+        end_row, end_col = end_position
+
+        distances: list[int] = [-1] * len(neighbours)
+        predecessors: list[int] = [-1] * len(neighbours)
+        expanded: bytearray = bytearray(len(neighbours))
+        distances[start_id] = 0
+        discovery_order = count()
+        heuristic: int = abs(start_position[0] - end_row) + abs(start_position[1] - end_col)
+        heap: list[tuple] = [(heuristic, heuristic, next(discovery_order), start_id)]
+
+        while len(heap) > 0:
+            current_id = heappop(heap)[3]
+            if current_id == end_id:
+                return DistanceField(start_position, distances, predecessors, self.cols).get_path(end_position)
+            if expanded[current_id]:
+                continue  # outdated entry of the heap
+            expanded[current_id] = 1
+            self.expanded_positions += 1
+            next_distance = distances[current_id] + 1
+
+            for neighbour in neighbours[current_id]:
+                if ((neighbour == end_id or not blocked[neighbour])
+                        and (distances[neighbour] < 0 or next_distance < distances[neighbour])):
+                    distances[neighbour] = next_distance
+                    predecessors[neighbour] = current_id
+                    row, col = positions[neighbour]
+                    heuristic = abs(row - end_row) + abs(col - end_col)
+                    heappush(heap, (next_distance + heuristic, heuristic, next(discovery_order), neighbour))
+
+        return [start_position]
+
+    def _bidirectional_search(self, start_position: tuple[int, int], end_position: tuple[int, int],
+                              blocked_positions: set[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Breadth-first search run from both ends at once, always expanding one whole level of the smaller frontier.
+        The searches meet around half way, so far fewer positions are expanded on open boards
+        :param start_position: coordinates of the start of the path
+        :param end_position: coordinates of the end of the path (reachable even if blocked)
+        :param blocked_positions: positions that cannot be crossed
+        :return: path to end_position if possible, otherwise list with one element [start_position]
+        """
+        if start_position == end_position:
+            return [start_position]
+
+        blocked: bytearray = self._get_blocked_ids(blocked_positions)
+        start_id, end_id = self.get_tile_id(start_position), self.get_tile_id(end_position)
+        forward_distances: list[int] = [-1] * len(self.neighbours)
+        forward_predecessors: list[int] = [-1] * len(self.neighbours)
+        backward_distances: list[int] = [-1] * len(self.neighbours)
+        backward_predecessors: list[int] = [-1] * len(self.neighbours)
+        forward_distances[start_id], backward_distances[end_id] = 0, 0
+        forward_frontier: list[int] = [start_id]
+        backward_frontier: list[int] = [end_id]
+        meeting_id: int | None = None
+
+        while len(forward_frontier) > 0 and len(backward_frontier) > 0 and meeting_id is None:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting_id = self._expand_level(
+                    forward_frontier, forward_distances, forward_predecessors, backward_distances, end_id, blocked)
+            else:
+                backward_frontier, meeting_id = self._expand_level(
+                    backward_frontier, backward_distances, backward_predecessors, forward_distances, start_id, blocked)
+
+        if meeting_id is None:
+            return [start_position]
+
+        path: list[tuple[int, int]] = DistanceField(start_position, forward_distances, forward_predecessors,
+                                                    self.cols).get_path(self.positions[meeting_id])
+        while meeting_id != end_id:
+            meeting_id = backward_predecessors[meeting_id]
+            path.append(self.positions[meeting_id])
+
+        return path
+
+    def _expand_level(self, frontier: list[int], distances: list[int], predecessors: list[int],
+                      other_distances: list[int], goal_id: int, blocked: bytearray) -> tuple[list[int], int | None]:
+        """
+        Expands one level of one side of PathFinder._bidirectional_search()
+        :param frontier: tile ids of the current level of this side
+        :param distances: distances of the tiles discovered by this side (-1 if not discovered)
+        :param predecessors: predecessors of the tiles discovered by this side
+        :param other_distances: distances of the tiles discovered by the other side
+        :param goal_id: origin of the other side (reachable even if blocked)
+        :param blocked: flags of the tiles that cannot be crossed
+        :return: tile ids of the next level and tile id where both sides meet with the shortest total length
+        (None if they do not meet in this level)
+        """
+        neighbours = self.neighbours
+        next_frontier: list[int] = []
+        meeting_id: int | None = None
+        meeting_length: int | None = None
+
+        for current_id in frontier:
+            self.expanded_positions += 1
+            next_distance = distances[current_id] + 1
+
+            for neighbour in neighbours[current_id]:
+                if distances[neighbour] < 0 and (neighbour == goal_id or not blocked[neighbour]):
+                    distances[neighbour] = next_distance
+                    predecessors[neighbour] = current_id
+                    next_frontier.append(neighbour)
+
+                    # the whole level is expanded, so the shortest of the meetings found is kept
+                    if other_distances[neighbour] >= 0 and (meeting_length is None or
+                                                            next_distance + other_distances[neighbour] < meeting_length):
+                        meeting_id = neighbour
+                        meeting_length = next_distance + other_distances[neighbour]
+
+        return next_frontier, meeting_id
+
+    def _breadth_first_search(self, origin: tuple[int, int], blocked_positions: set[tuple[int, int]],
+                              max_steps: int | None = None, target: tuple[int, int] | None = None) -> DistanceField:
+        """
+        Breadth-first search storing only the predecessor of each position (paths are rebuilt when needed)
+        :param origin: coordinates of the origin of the search
+        :param blocked_positions: positions that cannot be crossed (they are reached but not expanded)
+        :param max_steps: maximum number of steps to explore (optional)
+        :param target: if specified, the search stops as soon as this position is reached
+        :return: DistanceField with the distances and predecessors of all explored positions
+        """
+        target_ids: set[int] = set() if target is None else {self.get_tile_id(target)}
+        distances, predecessors = self._search_levels([self.get_tile_id(origin)], blocked_positions,
+                                                      max_steps, target_ids)
+
+        return DistanceField(origin, distances, predecessors, self.cols, max_steps)
+
+    def _search_levels(self, origin_ids: list[int], blocked_positions: set[tuple[int, int]],
+                       max_steps: int | None = None,
+                       target_ids: set[int] | None = None) -> tuple[list[int], list[int]]:
+        """
+        Breadth-first search from one or several origins at once, shared by PathFinder._breadth_first_search(),
+        PathFinder.find_within() and PathFinder.flow_field()
+        :param origin_ids: tile ids of the origins (they are expanded even if blocked)
+        :param blocked_positions: positions that cannot be crossed (they are reached but not expanded)
+        :param max_steps: maximum number of steps to explore (optional)
+        :param target_ids: if specified, the search stops as soon as one of these tile ids is reached
+        :return: distances and predecessors indexed by tile id (-1 if not reached)
+        """
+        neighbours = self.neighbours
+        blocked: bytearray = self._get_blocked_ids(blocked_positions)
+
+        distances: list[int] = [-1] * len(neighbours)
+        predecessors: list[int] = [-1] * len(neighbours)
+        for origin_id in origin_ids:
+            distances[origin_id] = 0
+        queue: deque = deque(origin_ids)
+        target_ids = set() if target_ids is None else target_ids
+        target_reached: bool = False
+
+        while len(queue) > 0 and not target_reached:
+            current_id = queue.popleft()
+            self.expanded_positions += 1
+            next_distance = distances[current_id] + 1
+            if max_steps is not None and next_distance > max_steps:
+                break  # queue is ordered by distance, all remaining positions are at the limit
+
+            # nearby tiles are listed in the same order as explored by DungeonLayout.find_shortest_path()
+            for neighbour in neighbours[current_id]:
+                if distances[neighbour] < 0:
+                    distances[neighbour] = next_distance
+                    predecessors[neighbour] = current_id
+                    if neighbour in target_ids:
+                        target_reached = True
+                        break
+                    if not blocked[neighbour]:
+                        queue.append(neighbour)
+
+        return distances, predecessors
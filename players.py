@@ -133,6 +133,7 @@ class Sawyer(Player):
         self.ignores += ["pickable", "treasure"]
         self.token.color.a = 0.6  # changes transparency
         self.ability_active = True
+        self.get_dungeon().pf.invalidate()  # hidden characters do not block paths
         self.remaining_moves -= 1
 
     def unhide(self) -> None:
@@ -144,6 +145,7 @@ class Sawyer(Player):
         self.ignores.remove("pickable")
         self.ignores.remove("treasure")
         self.ability_active = False
+        self.get_dungeon().pf.invalidate()  # hidden characters do not block paths
 
     def enhance_damage(self, damage: int) -> int:
         """
@@ -1,17 +1,22 @@
 # This is the setup file necessary to build the cythonised_lights module
+# Desktop only, see the import of cythonized_lights in darkness_manager.py
+# Set CYTHONIZED_LIGHTS_OPENMP=1 to build it with OpenMP, so bright spots are composited in parallel
 
+from os import environ
 from setuptools import setup, Extension
 from Cython.Build import cythonize
-import numpy
+
+openmp_flags = ["-fopenmp"] if environ.get("CYTHONIZED_LIGHTS_OPENMP") == "1" else []
 
 extensions = [
     Extension(
         name="cythonized_lights",
         sources=["cythonized_lights.pyx"],
-        include_dirs=[numpy.get_include()]
+        extra_compile_args=openmp_flags,
+        extra_link_args=openmp_flags
     )
 ]
 
 setup(
     ext_modules=cythonize(extensions, language_level=3)
-)
\ No newline at end of file
+)
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import sys
+
+# Kivy must not parse the arguments of pytest nor write logs when imported
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_FILELOG", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from dungeon_blueprint import Blueprint
+from dungeon_classes import DungeonLayout
+
+
+class FakeGame:
+    """
+    Stands for MineMadnessGame, which needs the whole app. Any method called by the dungeon does nothing
+    """
+
+    def __init__(self, level: int = 1):
+        self.level: int = level
+        self.advanced_start: bool = False
+        self.turn = None
+
+    def __getattr__(self, name: str):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def build_dungeon():
+    """
+    Builds a DungeonLayout of level 1 (6x6) from an ASCII map, one string per row. "." are free positions, any other
+    char is placed as an item of the Blueprint
+    """
+    def build(ascii_map: list[str], search_engine: str = "bfs") -> DungeonLayout:
+        blueprint = Blueprint(len(ascii_map), len(ascii_map[0]))
+        for y, row in enumerate(ascii_map):
+            for x, char in enumerate(row):
+                if char != ".":
+                    blueprint.place_item(char, (y, x))
+
+        dungeon = DungeonLayout(game=FakeGame(), blueprint=blueprint, torches_dict={}, search_engine=search_engine)
+        dungeon._set_tiles()
+        dungeon._place_tokens()
+        return dungeon
+
+    return build
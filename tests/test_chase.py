@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+CORRIDOR_MAP: list[str] = ["......",
+                           "..%...",
+                           "..H...",
+                           "##.###",
+                           "##H###",
+                           "######"]
+
+
+def get_monster(dungeon, position: tuple[int, int]):
+    monster = dungeon.get_tile(position).get_token("monster").character
+    monster.remaining_moves = monster.stats.moves
+    return monster
+
+
+def test_second_monster_goes_around_the_first_one_at_the_end_of_a_corridor(build_dungeon):
+    dungeon = build_dungeon(CORRIDOR_MAP)
+    player_position = (1, 2)
+    follower = get_monster(dungeon, (4, 2))
+
+    chase_field = dungeon.get_chase_field(follower.chases, follower.blocked_by)
+    # the FlowField leads through the corridor to the access already taken by the leading monster
+    assert chase_field.get_source(follower.get_position()) == player_position
+    assert chase_field.get_access(follower.get_position()) == (2, 2)
+
+    path = follower._get_chase_path(chase_field, player_position, smart=True)
+
+    assert dungeon.are_nearby(path[-1], player_position)
+    assert not dungeon.get_tile(path[-1]).has_token("monster")
+
+
+def test_monster_follows_the_chase_field_when_its_access_is_free(build_dungeon):
+    dungeon = build_dungeon(["......",
+                             "..%...",
+                             "......",
+                             "##.###",
+                             "##H###",
+                             "######"])
+    player_position = (1, 2)
+    monster = get_monster(dungeon, (4, 2))
+
+    chase_field = dungeon.get_chase_field(monster.chases, monster.blocked_by)
+    path = monster._get_chase_path(chase_field, player_position, smart=True)
+
+    assert path == [(4, 2), (3, 2), (2, 2)]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import pytest
+
+from frame_governor import FrameGovernor
+
+
+def run_ticks(governor: FrameGovernor, ticks: int, frame_time: float, render_time: float) -> list[bool]:
+    """
+    Runs flicker ticks like DarknessManager.darkness_flicker() does, with constant app frame and render times
+    :return: for each tick, True if it was skipped
+    """
+    skipped: list[bool] = []
+    clock: float = 0.0
+    for _ in range(ticks):
+        clock += governor.interval
+        skip = governor.should_skip(frame_time)
+        if not skip:
+            governor.record_render(clock, clock + render_time)
+        skipped.append(skip)
+    return skipped
+
+
+def test_governor_recovers_when_frame_time_stays_over_the_budget():
+    governor = FrameGovernor(frame_budget=1 / 60)
+    slow_frame_time = governor.frame_budget * 2  # e.g. a device refreshing at 30 Hz
+
+    skipped = run_ticks(governor, 200, slow_frame_time, render_time=0.001)
+
+    # ticks are never all skipped, so the torches keep flickering
+    assert not any(all(skipped[index:index + governor.max_skips + 1])
+                   for index in range(len(skipped) - governor.max_skips))
+    # the budget follows the device and the darkness is rendered at every tick again
+    assert governor.frame_budget * 1.5 >= slow_frame_time
+    assert not any(skipped[-50:])
+
+
+def test_governor_skips_short_spikes_without_lowering_the_load():
+    governor = FrameGovernor(frame_budget=1 / 60)
+
+    skipped = run_ticks(governor, governor.max_skips, governor.frame_budget * 4, render_time=0.001)
+
+    assert all(skipped)
+    assert governor.interval == governor.min_interval
+    assert governor.scale_modifier == 1.0
+    assert governor.frame_budget == pytest.approx(1 / 60)
+
+
+def test_governor_restores_resolution_and_budget_after_a_spike():
+    governor = FrameGovernor(frame_budget=1 / 60)
+
+    run_ticks(governor, 40, governor.frame_budget * 2, render_time=0.020)
+    assert governor.scale_modifier < 1.0
+    assert governor.frame_budget > 1 / 60
+
+    skipped = run_ticks(governor, 2000, 1 / 60, render_time=0.001)
+
+    assert not any(skipped[-50:])
+    assert governor.scale_modifier == 1.0
+    assert governor.interval == governor.min_interval
+    assert governor.frame_budget == pytest.approx(1 / 60)
+
+
+def test_one_off_renders_are_left_out_of_the_average():
+    governor = FrameGovernor(frame_budget=1 / 60)
+    run_ticks(governor, 10, 1 / 60, render_time=0.001)
+
+    governor.record_render(10.0, 10.1, one_off=True)  # e.g. the static layer is rebuilt
+
+    assert governor.render_time < governor.render_budget
+    assert governor.scale_modifier == 1.0
+    assert governor.interval == governor.min_interval
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from random import Random, seed
+
+import pytest
+from numpy import full, uint8, array_equal
+
+from light_kernels import BrightSpot, get_light_kernel, get_falloff_table, get_flicker_gradient, composite_bright_spot
+
+cythonized_lights = pytest.importorskip("cythonized_lights")
+
+WIDTH: int = 120
+HEIGHT: int = 90
+DARKNESS_INTENSITY: int = 150
+
+# bounding boxes clipped at every edge and corner, one outside the layer and one covering all of it
+EDGE_SPOTS: list[BrightSpot] = [BrightSpot((0, 45), 30, 0.8, (0.45, 0.75)),
+                                BrightSpot((WIDTH, 45), 30, 0.8, (0.45, 0.75)),
+                                BrightSpot((60, -10), 30, 0.8, (0.45, 0.75)),
+                                BrightSpot((60, HEIGHT + 10), 30, 0.8, (0.45, 0.75)),
+                                BrightSpot((-5.5, -5.5), 25, 1, (0.6, 0.6)),
+                                BrightSpot((WIDTH - 0.5, HEIGHT - 0.5), 25, 1, (0.6, 0.6)),
+                                BrightSpot((-100, -100), 30, 0.8, (0.45, 0.75)),
+                                BrightSpot((60, 45), 200, 0.5, (0.45, 0.75))]
+
+
+def get_seeded_spots(number: int) -> list[BrightSpot]:
+    random = Random(0)
+    return [BrightSpot((random.uniform(-20, WIDTH + 20), random.uniform(-20, HEIGHT + 20)),
+                       random.uniform(5, 60), random.uniform(0.2, 1), (0.45, 0.75)) for _ in range(number)]
+
+
+def render(engine, bright_spots: list[BrightSpot]):
+    seed(0)  # flicker gradients are drawn per bright spot, both engines must get the same ones
+    alpha_layer = full((HEIGHT, WIDTH), DARKNESS_INTENSITY, dtype=uint8)
+    for bright_spot in bright_spots:
+        kernel = get_light_kernel(bright_spot.center, bright_spot.radius, WIDTH, HEIGHT)
+        table = get_falloff_table(get_flicker_gradient(bright_spot.gradient), bright_spot.intensity,
+                                  DARKNESS_INTENSITY)
+        engine(alpha_layer, kernel, table, DARKNESS_INTENSITY)
+    return alpha_layer
+
+
+@pytest.mark.parametrize("bright_spots", [EDGE_SPOTS, get_seeded_spots(40)], ids=["edges", "seeded"])
+def test_engines_produce_identical_alpha(bright_spots):
+    python_alpha = render(composite_bright_spot, bright_spots)
+    cython_alpha = render(cythonized_lights.composite_bright_spot, bright_spots)
+
+    assert (python_alpha < DARKNESS_INTENSITY).any()
+    assert array_equal(python_alpha, cython_alpha)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from itertools import product
+
+import pytest
+
+ENGINES: tuple[str, ...] = ("bfs", "a_star", "bidirectional")
+
+WALLS_MAP: list[str] = [".#....",
+                        ".#.##.",
+                        ".#..#.",
+                        "..#.#.",
+                        "#...#*",
+                        ".#...#"]
+
+
+def get_path_lengths(dungeon) -> dict[tuple, int]:
+    """
+    Finds the shortest path between every pair of free positions, avoiding walls
+    :return: length of each path, by (start, end)
+    """
+    free_positions = [position for position in product(range(dungeon.rows), range(dungeon.cols))
+                      if not dungeon.get_tile(position).has_token("wall")]
+    return {(start, end): len(dungeon.find_shortest_path(start, end, excluded=["wall"]))
+            for start, end in product(free_positions, repeat=2)}
+
+
+@pytest.mark.parametrize("engine", ENGINES[1:])
+def test_engines_find_paths_as_short_as_bfs(build_dungeon, engine):
+    bfs_lengths = get_path_lengths(build_dungeon(WALLS_MAP, search_engine="bfs"))
+    engine_lengths = get_path_lengths(build_dungeon(WALLS_MAP, search_engine=engine))
+
+    assert engine_lengths == bfs_lengths
+    assert bfs_lengths[((0, 0), (5, 4))] == 10
+    assert bfs_lengths[((0, 0), (5, 0))] == 1  # enclosed by walls, no path
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engine_paths_are_walkable(build_dungeon, engine):
+    dungeon = build_dungeon(WALLS_MAP, search_engine=engine)
+
+    path = dungeon.find_shortest_path((0, 0), (5, 4), excluded=["wall"])
+
+    assert path[0] == (0, 0) and path[-1] == (5, 4)
+    assert all(dungeon.are_nearby(position, next_position) for position, next_position in zip(path, path[1:]))
+    assert not any(dungeon.get_tile(position).has_token("wall") for position in path)
@@ -55,6 +55,8 @@ class Tile(Button):
         :return: None
         """
         self.tokens[token.kind].append(token)
+        self.dungeon.occupancy.add_token(token.kind, self.position)
+        self.dungeon.pf.invalidate()
 
     def get_token(self, token_kind: str) -> Token:
         """
@@ -71,6 +73,8 @@ class Tile(Button):
         :return: None
         """
         self.tokens[token.kind].remove(token)
+        self.dungeon.occupancy.remove_token(token.kind, self.position)
+        self.dungeon.pf.invalidate()
 
     def delete_all_tokens(self) -> None:
         """
@@ -128,11 +132,7 @@ class Tile(Button):
         :param position: position to check
         :return: True if is nearby, False otherwise
         """
-        directions = (-1, 0), (1, 0), (0, -1), (0, 1)
-        return any(
-            (self.position[0] + dx, self.position[1] + dy) == position
-            for dx, dy in directions
-        )
+        return abs(self.row - position[0]) + abs(self.col - position[1]) == 1
 
     def place_item(self, token_kind: str, token_species: str,
                    character: Character | None,  size_modifier: float = 1.0,
@@ -183,49 +183,46 @@ class Tile(Button):
         self.set_token(token)
         self.bind(pos=self.update_tokens_pos)
 
-    def check_if_enable(self, active_player: Player) -> bool:
+    def check_if_enable(self, active_player: Player, reach_field: DistanceField | None = None) -> bool:
         """
         Check if the Tile fulfills the requirements to be activated
         :param active_player: current active Player of the game
+        :param reach_field: DistanceField returned by DungeonLayout.get_reach_field() for the active_player. If not
+        passed, it is computed here
         :return: True if the Tile has to be activated, False otherwise
         """
+        if reach_field is None:
+            reach_field = self.dungeon.get_reach_field(active_player)
+
         if self.has_token("player"):
             return self._check_with_player_token(active_player)
         if self.has_token("wall"):
-            return self._check_with_wall_token(active_player)
+            return self._check_with_wall_token(active_player, reach_field)
 
         # monsters have preference over traps
         if self.has_token("monster") and not self.get_token("monster").character.is_hidden:
                                           #or not self.has_token("trap")):
-            return self._check_with_monster_token(active_player)
+            return self._check_with_monster_token(active_player, reach_field)
         if self.has_token("trap") and not self.get_token("trap").character.is_hidden: #and not self.has_token("monster"):
-            return self._check_with_trap_token(active_player)
+            return self._check_with_trap_token(active_player, reach_field)
         #if self.has_token("monster") and self.has_token("trap"):
             #return self._check_with_monster_token(active_player) or self._check_with_trap_token(active_player)
 
         if active_player.using_dynamite:
-            return (self.dungeon.check_if_connexion(active_player.token.position,
-                                                    self.position,
-                                                    [token_kind for token_kind in active_player.blocked_by
-                                                     if token_kind != "trap"],  # traps do not block shooting
-                                                    active_player.stats.shooting_range))
+            return reach_field.reaches(self.position)
         else:
             # if characters are hidden will give connexion so no need to check within "check_with" methods
-            return self.dungeon.check_if_connexion(active_player.token.position, self.position,
-                                                   active_player.blocked_by, active_player.remaining_moves)
+            return reach_field.reaches(self.position)
 
-    def _check_with_monster_token(self, active_player: Player) -> bool:
+    def _check_with_monster_token(self, active_player: Player, reach_field: DistanceField) -> bool:
         """
         Checks if a Tile having a Token of Token.kind "monster" fulfills the requirements to be activated
         :param active_player: current active Player of the game
+        :param reach_field: DistanceField bounded to the reach of the active_player
         :return: True if the Tile has to be activated, False otherwise
         """
         if active_player.using_dynamite:
-            return (self.dungeon.check_if_connexion(active_player.token.position,
-                                                    self.position,
-                                                    [token_kind for token_kind in active_player.blocked_by
-                                                     if token_kind != "trap"],
-                                                    active_player.stats.shooting_range))
+            return reach_field.reaches(self.position)
 
         #if self.get_token("monster").character.is_hidden:
             #return True
@@ -235,19 +232,15 @@ class Tile(Button):
 
         return False
 
-    def _check_with_wall_token(self, active_player: Player) -> bool:
+    def _check_with_wall_token(self, active_player: Player, reach_field: DistanceField) -> bool:
         """
         Checks if a Tile having a Token of Token.kind "wall" fulfills the requirements to be activated
         :param active_player: current active Player of the game
+        :param reach_field: DistanceField bounded to the reach of the active_player
         :return: True if the Tile has to be activated, False otherwise
         """
         if active_player.using_dynamite:
-            return (self.dungeon.check_if_connexion(active_player.token.position,
-                                                    self.position,
-                                                    [token_kind for token_kind in active_player.blocked_by
-                                                     if token_kind != "trap"],
-                                                    active_player.stats.shooting_range) and
-            not self.has_token("wall","rock"))
+            return reach_field.reaches(self.position) and not self.has_token("wall", "rock")
 
         elif self.is_nearby(active_player.token.position) and not active_player.is_hidden:
             return active_player.can_dig(self.get_token("wall").species)
@@ -269,18 +262,15 @@ class Tile(Button):
 
         return True
 
-    def _check_with_trap_token(self, active_player: Player) -> bool:
+    def _check_with_trap_token(self, active_player: Player, reach_field: DistanceField) -> bool:
         """
         Checks if a Tile having a Token of Token.kind "trap" fulfills the requirements to be activated
         :param active_player: active_player: current active Player of the game
+        :param reach_field: DistanceField bounded to the reach of the active_player
         :return: True if the Tile has to be activated, False otherwise
         """
         if active_player.using_dynamite:
-            return (self.dungeon.check_if_connexion(active_player.token.position,
-                                                    self.position,
-                                                    [token_kind for token_kind in active_player.blocked_by
-                                                     if token_kind != "trap"],
-                                                    active_player.stats.shooting_range))
+            return reach_field.reaches(self.position)
 
         #if self.get_token("trap").character.hidden:
             #return True
@@ -374,9 +364,8 @@ class Tile(Button):
             ExplosionToken(pos=self.pos, size=self.size)
 
         if App.get_running_app().flickering_torches_on:
-            self.dungeon.add_bright_spot(center=self.center,
-                                        radius=self.width * 2,
-                                        intensity=1.0,
-                                        gradient=(0.95, 0.95),
-                                        timeout=0,
-                                        max_timeout=0.25)
+            self.dungeon.dm.add_bright_spot(center=self.center,
+                                            radius=self.width * 2,
+                                            intensity=1.0,
+                                            gradient=(0.95, 0.95),
+                                            duration=0.25)
@@ -36,6 +36,7 @@ class Trap:
         """
         self.token.color.a = 1  # changes transparency
         self.hidden = False
+        self.token.dungeon.pf.invalidate()  # visible traps block paths
 
     def show_and_damage(self, player: Player) -> None:
         """